@@ -3,13 +3,20 @@
 使用 LLM 对查询结果进行自然语言分析
 """
 import logging
+import threading
+from collections import OrderedDict
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 
 from agent.llm import get_llm_client
 
 logger = logging.getLogger(__name__)
 
+# 数据摘要缓存：按 DataFrame 内容哈希缓存摘要文本，超出容量时淘汰最久未使用的条目
+SUMMARY_CACHE_SIZE = 128
+_summary_cache: "OrderedDict[Tuple, str]" = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
 
 def analyze_result(
         df: pd.DataFrame,
@@ -57,9 +64,23 @@ def analyze_result(
         return f"结果分析失败: {str(e)}"
 
 
+def _summary_cache_key(df: pd.DataFrame) -> Optional[Tuple]:
+    """
+    计算数据摘要的缓存键（列名、形状与逐行内容哈希）
+    
+    Returns:
+        缓存键，包含无法哈希的数据（如列表单元格）时返回 None
+    """
+    try:
+        content_hash = int(pd.util.hash_pandas_object(df, index=True).sum())
+    except TypeError:
+        return None
+    return tuple(df.columns), df.shape, content_hash
+
+
 def _prepare_data_summary(df: pd.DataFrame) -> str:
     """
-    准备结构化数据摘要
+    准备结构化数据摘要（相同内容的 DataFrame 直接返回缓存结果）
     
     Args:
         df: 数据 DataFrame
@@ -70,6 +91,34 @@ def _prepare_data_summary(df: pd.DataFrame) -> str:
     if df is None or df.empty:
         return "数据为空"
 
+    key = _summary_cache_key(df)
+    if key is None:
+        return _build_data_summary(df)
+
+    with _summary_cache_lock:
+        summary = _summary_cache.get(key)
+        if summary is not None:
+            _summary_cache.move_to_end(key)
+            return summary
+
+    summary = _build_data_summary(df)
+    with _summary_cache_lock:
+        _summary_cache[key] = summary
+        if len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+    return summary
+
+
+def _build_data_summary(df: pd.DataFrame) -> str:
+    """
+    构建结构化数据摘要
+    
+    Args:
+        df: 非空数据 DataFrame
+        
+    Returns:
+        数据摘要字符串
+    """
     summary_parts = []
 
     # 基本信息
@@ -250,7 +299,11 @@ def _build_analysis_messages(
 """
 
     if chart_path:
-        user_prompt += f"\n图表路径: {chart_path}"
+        # 内联图表（data URI）不写入提示词，避免把图片编码作为文本发送给 LLM
+        if chart_path.startswith("data:"):
+            user_prompt += "\n已生成图表"
+        else:
+            user_prompt += f"\n图表路径: {chart_path}"
 
     return [
         {"role": "system", "content": system_prompt},
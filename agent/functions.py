@@ -2,13 +2,15 @@
 Function Calling 实现
 包含 run_query, draw_chart, explain_result 等函数
 """
+import asyncio
 import logging
+from concurrent.futures import Executor
 from typing import Dict, Any, Optional
 import pandas as pd
 
 from db.clickhouse_client import get_client
 from utils.time_utils import parse_time_range
-from utils.chart import draw_chart
+from utils.chart import draw_chart, chart_label
 from agent.analyzer import analyze_result
 from config.settings import settings
 
@@ -43,6 +45,26 @@ class QueryPlanExecutor:
         
         return df
     
+    async def run_query_async(
+        self,
+        query_plan: Dict[str, Any],
+        pool: Optional[Executor] = None
+    ) -> pd.DataFrame:
+        """
+        run_query 的异步版本，查询在线程池中执行，不阻塞事件循环
+        
+        ClickHouse 客户端按线程维护连接，多个查询可同时在途。
+        
+        Args:
+            query_plan: QueryPlan 字典
+            pool: 执行查询的线程池，默认使用事件循环的默认线程池
+            
+        Returns:
+            查询结果 DataFrame
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(pool, self.run_query, query_plan)
+    
     def get_generated_sql(self, plan: Dict[str, Any]) -> str:
         """
         获取生成的 SQL（公开方法，用于展示）
@@ -216,7 +238,7 @@ class QueryPlanExecutor:
                 chart_type=chart_type,
                 title=title
             )
-            logger.info(f"图表生成成功: {chart_path}")
+            logger.info(f"图表生成成功: {chart_label(chart_path)}")
             return chart_path
         except Exception as e:
             logger.error(f"图表生成失败: {e}")
@@ -2,13 +2,15 @@
 智能分析执行引擎
 整合SQL生成、质量保障和分析结果生成
 """
+import asyncio
 import logging
+from concurrent.futures import Executor
 from typing import Dict, Any, Optional
 import pandas as pd
 
 from agent.query_quality_guard import QueryQualityGuard
 from agent.intelligent_analyzer import IntelligentAnalyzer
-from utils.chart import draw_chart
+from utils.chart import draw_chart, chart_label
 
 logger = logging.getLogger(__name__)
 
@@ -101,7 +103,7 @@ class IntelligentQueryEngine:
                         title=f"网络质量分析 - {user_query[:30]}"
                     )
                     result["chart_path"] = chart_path
-                    logger.info(f"图表生成成功: {chart_path}")
+                    logger.info(f"图表生成成功: {chart_label(chart_path)}")
                 except Exception as e:
                     logger.warning(f"图表生成失败: {e}")
             
@@ -253,6 +255,15 @@ def create_enhanced_functions_executor():
             else:
                 raise Exception(f"查询执行失败: {result['error']}")
         
+        async def run_query_async(
+            self,
+            query_plan: Dict[str, Any],
+            pool: Optional[Executor] = None
+        ) -> pd.DataFrame:
+            """run_query 的异步版本（与 QueryPlanExecutor 接口一致），在线程池中执行"""
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(pool, self.run_query, query_plan)
+        
         def get_generated_sql(self, query_plan: Dict[str, Any]) -> str:
             """获取生成的SQL（兼容原接口）"""
             if hasattr(self, '_last_result') and self._last_result:
@@ -2,6 +2,7 @@
 LLM 模型调用封装
 """
 import logging
+import threading
 from typing import Optional, List, Dict, Any
 from openai import OpenAI
 
@@ -121,12 +122,15 @@ class LLMClient:
 
 # 全局客户端实例（懒加载）
 _client: Optional[LLMClient] = None
+_client_lock = threading.Lock()
 
 
 def get_llm_client() -> LLMClient:
     """
     获取 LLM 客户端实例（单例模式）
     
+    并发首次调用时加锁，确保只创建一个实例。
+    
     Returns:
         LLMClient 实例
     """
@@ -135,6 +139,8 @@ def get_llm_client() -> LLMClient:
     if _client is not None:
         return _client
     
-    _client = LLMClient()
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
     return _client
 
@@ -5,6 +5,9 @@
 import json
 import logging
 from typing import Dict, Any, Optional, List
+
+import orjson
+
 from agent.llm import get_llm_client
 
 logger = logging.getLogger(__name__)
@@ -130,7 +133,11 @@ class QueryPlanner:
         # 验证 QueryPlan
         self._validate_plan(query_plan)
         
-        logger.info(f"QueryPlan 生成成功: {json.dumps(query_plan, ensure_ascii=False, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "QueryPlan 生成成功: %s",
+                orjson.dumps(query_plan, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+            )
         return query_plan
     
     def _get_database_context(self, query: str) -> str:
@@ -4,6 +4,7 @@ RAG 向量检索模块
 """
 import os
 import logging
+import threading
 from typing import List, Optional
 from pathlib import Path
 import numpy as np
@@ -194,12 +195,15 @@ class RAGRetriever:
 
 # 全局检索器实例（懒加载）
 _retriever: Optional[RAGRetriever] = None
+_retriever_lock = threading.Lock()
 
 
 def get_retriever() -> RAGRetriever:
     """
     获取 RAG 检索器实例（单例模式）
     
+    并发首次调用时加锁，确保嵌入模型与索引只加载一次。
+    
     Returns:
         RAGRetriever 实例
     """
@@ -208,7 +212,9 @@ def get_retriever() -> RAGRetriever:
     if _retriever is not None:
         return _retriever
     
-    _retriever = RAGRetriever()
+    with _retriever_lock:
+        if _retriever is None:
+            _retriever = RAGRetriever()
     return _retriever
 
 
@@ -1,14 +1,51 @@
 """
 简化版查询规划器 - 不使用Function Calling
 """
-import json
 import logging
 import re
 from typing import Dict, Any
+
+import orjson
+
 from agent.llm import get_llm_client
 
 logger = logging.getLogger(__name__)
 
+# 运营商 / 省份 中文名 -> 编码映射（模块加载时构建一次）
+_ISP_MAP = {
+    "电信": "chinatelecom",
+    "移动": "chinamobile",
+    "联通": "chinaunicom",
+    "铁通": "chinatietong",
+}
+_PROVINCE_MAP = {
+    "浙江": "zhejiang",
+    "江苏": "jiangsu",
+    "北京": "beijing",
+    "上海": "shanghai",
+    "广东": "guangdong",
+    "辽宁": "liaoning",
+}
+
+# 交给 time_utils 解析的自然语言日期关键词
+_NL_DAY_KEYWORDS = ("昨天", "今天", "前天")
+
+# 规则匹配用到的关键词：每次规划只用一个正则扫描一遍问题，得到命中的关键词集合
+# （按长度降序排列，同一位置优先匹配较长的关键词）
+_QUERY_KEYWORDS = (
+    "近1h", "近1小时", "近3h", "近3小时", "近24h", "近24小时",
+    *_NL_DAY_KEYWORDS,
+    "丢包", "延迟", "响应时间", "质量", "覆盖", "性能",
+    *_ISP_MAP, *_PROVINCE_MAP,
+    "目标节点", "target_node", "地区", "src_isp", "src_province",
+    "hostname", "探测设备", "发起探测", "运营商", "省份", "任务", "task_name",
+    "图", "趋势", "对比",
+)
+_KEYWORD_RE = re.compile("|".join(map(re.escape, sorted(_QUERY_KEYWORDS, key=len, reverse=True))))
+# 在小写化后的问题中匹配的英文关键词
+_LOWER_KEYWORDS = ("packet_loss", "rtt", *_ISP_MAP.values())
+_LOWER_KEYWORD_RE = re.compile("|".join(map(re.escape, sorted(_LOWER_KEYWORDS, key=len, reverse=True))))
+
 class SimpleQueryPlanner:
     """简化的查询规划器"""
     
@@ -41,29 +78,28 @@ class SimpleQueryPlanner:
             "original_query": user_query  # 保存原始问题
         }
         
+        # 一次扫描得到问题中出现的全部关键词，之后的规则只做集合查找
+        hits = set(_KEYWORD_RE.findall(user_query))
+        query_lower = user_query.lower()
+        lower_hits = set(_LOWER_KEYWORD_RE.findall(query_lower))
+        
         # 解析时间范围 - 增强版自然语言时间处理
-        if "近1h" in user_query or "近1小时" in user_query:
+        if "近1h" in hits or "近1小时" in hits:
             query_plan["filters"]["time_range"] = "last_1_hour"
-        elif "近3h" in user_query or "近3小时" in user_query:
+        elif "近3h" in hits or "近3小时" in hits:
             query_plan["filters"]["time_range"] = "last_3_hour"
-        elif "近24h" in user_query or "近24小时" in user_query:
+        elif "近24h" in hits or "近24小时" in hits:
             query_plan["filters"]["time_range"] = "last_24_hour"
-        elif "昨天" in user_query:
-            # 直接传递自然语言，让time_utils处理
-            query_plan["filters"]["time_range"] = user_query
-        elif "今天" in user_query:
-            # 直接传递自然语言，让time_utils处理
-            query_plan["filters"]["time_range"] = user_query
-        elif "前天" in user_query:
+        elif not hits.isdisjoint(_NL_DAY_KEYWORDS):
             # 直接传递自然语言，让time_utils处理
             query_plan["filters"]["time_range"] = user_query
         
         # 解析指标
-        if "丢包" in user_query or "packet_loss" in user_query.lower():
+        if "丢包" in hits or "packet_loss" in lower_hits:
             query_plan["metrics"].append("avg_lost")
-        if "延迟" in user_query or "rtt" in user_query.lower() or "响应时间" in user_query:
+        if "延迟" in hits or "rtt" in lower_hits or "响应时间" in hits:
             query_plan["metrics"].append("avg_rtt")
-        if "质量" in user_query or "覆盖" in user_query or "性能" in user_query:
+        if "质量" in hits or "覆盖" in hits or "性能" in hits:
             # 质量分析需要丢包和延迟两个指标
             if "avg_lost" not in query_plan["metrics"]:
                 query_plan["metrics"].append("avg_lost")
@@ -74,36 +110,30 @@ class SimpleQueryPlanner:
         if not query_plan["metrics"]:
             query_plan["metrics"] = ["avg_lost"]
         
+        filters = query_plan["filters"]
+        
         # 解析运营商
-        isps = ["chinatelecom", "chinamobile", "chinaunicom", "chinatietong"]
-        isp_names = ["电信", "移动", "联通", "铁通"]
-        for isp, name in zip(isps, isp_names):
-            if name in user_query or isp in user_query.lower():
-                if "src_isp" not in query_plan["filters"]:
-                    query_plan["filters"]["src_isp"] = []
-                query_plan["filters"]["src_isp"].append(isp)
+        isps = [code for name, code in _ISP_MAP.items() if name in hits or code in lower_hits]
+        if isps:
+            filters["src_isp"] = isps
         
         # 解析省份
-        provinces = ["zhejiang", "jiangsu", "beijing", "shanghai", "guangdong", "liaoning"]
-        province_names = ["浙江", "江苏", "北京", "上海", "广东", "辽宁"]
-        for province, name in zip(provinces, province_names):
-            if name in user_query:
-                if "src_province" not in query_plan["filters"]:
-                    query_plan["filters"]["src_province"] = []
-                query_plan["filters"]["src_province"].append(province)
+        provinces = [code for name, code in _PROVINCE_MAP.items() if name in hits]
+        if provinces:
+            filters["src_province"] = provinces
         
-        # 解析目标节点相关查询 - 优先处理
-        if "目标节点" in user_query or "target_node" in user_query:
+        # 解析聚合方式 - 按优先级依次判断，命中即停止：目标节点 > 探测设备 > 地区覆盖 > 任务
+        if "目标节点" in hits or "target_node" in hits:
             query_plan["metrics"] = ["avg_lost", "avg_rtt"]
-            if "地区" in user_query or "src_isp" in user_query or "src_province" in user_query:
+            if "地区" in hits or "src_isp" in hits or "src_province" in hits:
                 # 目标节点覆盖地区分析
                 query_plan["aggregation"] = "group_by_target_node_province_isp"
             else:
                 # 目标节点丢包分析（按task_name分组，但查询target_node）
                 query_plan["aggregation"] = "group_by_target_node_task"
         # 解析设备相关查询 - 需要更精确的匹配
-        elif ("探测设备" in user_query and "hostname" in user_query) or ("发起探测" in user_query and "hostname" in user_query):
-            if "各运营商" in user_query or "运营商" in user_query:
+        elif "hostname" in hits and ("探测设备" in hits or "发起探测" in hits):
+            if "运营商" in hits:
                 # 按运营商统计设备数量
                 query_plan["aggregation"] = "group_by_isp"
                 query_plan["metrics"] = ["device_count"]
@@ -111,23 +141,23 @@ class SimpleQueryPlanner:
                 # 分析设备质量
                 query_plan["aggregation"] = "group_by_hostname_task"
                 query_plan["metrics"] = ["avg_lost", "avg_rtt"]
-        
-        # 解析地区覆盖查询 - 但不要覆盖已有的aggregation
-        if "覆盖" in user_query and ("地区" in user_query or "省份" in user_query):
-            if query_plan["aggregation"] == "none":  # 只有在未设置时才设置
-                query_plan["aggregation"] = "group_by_province_isp"
-        
-        # 解析任务相关查询 - 但不要覆盖已有的aggregation
-        if "任务" in user_query or "task_name" in user_query:
-            if query_plan["aggregation"] == "none":  # 只有在未设置时才设置
-                query_plan["aggregation"] = "group_by_hostname_task"
+        # 解析地区覆盖查询
+        elif "覆盖" in hits and ("地区" in hits or "省份" in hits):
+            query_plan["aggregation"] = "group_by_province_isp"
+        # 解析任务相关查询
+        elif "任务" in hits or "task_name" in hits:
+            query_plan["aggregation"] = "group_by_hostname_task"
         
         # 解析是否需要图表
-        if "图" in user_query or "趋势" in user_query or "对比" in user_query:
+        if "图" in hits or "趋势" in hits or "对比" in hits:
             query_plan["need_chart"] = True
-            query_plan["chart_type"] = "bar" if "对比" in user_query else "line"
+            query_plan["chart_type"] = "bar" if "对比" in hits else "line"
         
-        logger.info(f"生成QueryPlan: {json.dumps(query_plan, ensure_ascii=False, indent=2)}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "生成QueryPlan: %s",
+                orjson.dumps(query_plan, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+            )
         return query_plan
 
 
@@ -3,10 +3,11 @@ FastAPI 主入口
 提供 /chat API 接口
 """
 import logging
+from contextlib import asynccontextmanager
 from typing import Optional
 from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 from pydantic import BaseModel
 import os
 import sys
@@ -22,11 +23,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """服务进程启动时预热图表渲染（字体缓存与 Agg 后端），CLI 等导入场景不执行"""
+    from utils.chart import warm_up
+    try:
+        warm_up()
+    except Exception as e:
+        logger.warning(f"图表预热失败: {e}")
+    yield
+
+
 # 创建 FastAPI 应用
 app = FastAPI(
     title="网络探测数据 AI 分析 Agent",
     description="基于 ClickHouse + RAG + Function Calling 的数据分析系统",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # 挂载静态文件目录
@@ -40,6 +54,10 @@ except Exception as e:
 # 检查是否为生产模式（--prod 参数）
 PROD_MODE = "--prod" in sys.argv
 
+# uvicorn worker 数（uvicorn 自身也读取该变量；子进程继承主进程环境）。
+# 多 worker 时运行时配置只在处理请求的单个进程内生效，因此禁止 /engine/switch
+MULTI_WORKER = int(os.environ.get("WEB_CONCURRENCY", "1")) > 1
+
 # 生产模式下挂载React构建文件
 if PROD_MODE:
     try:
@@ -232,7 +250,13 @@ async def engine_status():
 
 @app.post("/engine/switch")
 async def switch_engine(enable_intelligent: bool = None):
-    """切换查询引擎（仅用于开发测试）"""
+    """切换查询引擎（仅用于开发测试，多 worker 模式下不可用）"""
+    if MULTI_WORKER:
+        raise HTTPException(
+            status_code=409,
+            detail="多 worker 模式下不支持运行时切换引擎，请设置 ENABLE_INTELLIGENT_ENGINE 后重启服务"
+        )
+    
     try:
         if enable_intelligent is None:
             raise HTTPException(status_code=400, detail="请指定是否启用智能引擎")
@@ -322,5 +346,20 @@ if __name__ == "__main__":
             print(f"🚀 启动开发模式服务: http://{args.host}:{args.port}")
             print("🛠️  开发模式：需要单独启动React前端")
         
-        uvicorn.run(app, host=args.host, port=args.port)
+        if args.prod:
+            # 生产模式：C 实现的事件循环/HTTP 解析器 + 多进程 worker
+            # /chat 已自行记录请求日志，关闭 uvicorn access log
+            run_kwargs = {
+                "http": "httptools",
+                "access_log": False,
+                "timeout_keep_alive": 30,
+            }
+            if sys.platform != "win32":
+                run_kwargs["loop"] = "uvloop"
+                run_kwargs["workers"] = int(os.environ.setdefault(
+                    "WEB_CONCURRENCY", str(max(2, (os.cpu_count() or 2) // 2))
+                ))
+            uvicorn.run("app:app", host=args.host, port=args.port, **run_kwargs)
+        else:
+            uvicorn.run(app, host=args.host, port=args.port)
 
@@ -124,7 +124,7 @@ def main():
         print("✅ 所有问题已修复！")
         print("="*70)
         print("\n可以运行以下命令验证:")
-        print("  python3 test_startup.py")
+        print("  python3 tests/test_startup.py")
         return 0
     else:
         print("\n" + "="*70)
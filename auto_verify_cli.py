@@ -5,120 +5,139 @@
 """
 import sys
 import os
+import importlib
 import importlib.util
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# 诊断输出缓冲：各检查阶段结束后一次性写出，避免逐行 print
+_output_lines = []
+
+
+def log(line: str = "") -> None:
+    """记录一行诊断输出"""
+    _output_lines.append(line)
+
+
+def flush_log() -> None:
+    """将缓冲的诊断输出一次性写到 stdout"""
+    if not _output_lines:
+        return
+    sys.stdout.write("\n".join(_output_lines) + "\n")
+    sys.stdout.flush()
+    _output_lines.clear()
+
+
+# 需要检查的模块及其关键属性
+_MODULES_TO_CHECK = (
+    ("config.settings", "settings"),
+    ("agent.llm", "get_llm_client"),
+    ("agent.rag", "get_retriever"),
+    ("agent.planner", "get_planner"),
+    ("agent.functions", "get_executor"),
+    ("agent.analyzer", "analyze_result"),
+    ("db.clickhouse_client", "get_client"),
+    ("utils.time_utils", "parse_time_range"),
+    ("utils.chart", "draw_chart"),
+)
+
+
+# 初始化检查：(错误标识, 显示名称, 模块, 工厂函数)，按依赖顺序排列
+_INIT_SPECS = (
+    ("LLM", "LLM 客户端", "agent.llm", "get_llm_client"),
+    ("RAG", "RAG 检索器", "agent.rag", "get_retriever"),
+    ("Planner", "查询规划器", "agent.planner", "get_planner"),
+    ("Executor", "查询执行器", "agent.functions", "get_executor"),
+)
+
+
+def _check_module(module_name: str, attr_name: str):
+    """
+    导入单个模块并检查属性
+    
+    Returns:
+        (输出信息, 错误标识或 None)
+    """
+    try:
+        module = importlib.import_module(module_name)
+        if hasattr(module, attr_name):
+            return f"  ✓ {module_name}.{attr_name}", None
+        return f"  ❌ {module_name} 缺少 {attr_name}", f"{module_name}.{attr_name}"
+    except ImportError as e:
+        return f"  ❌ {module_name} 导入失败: {e}", module_name
+    except Exception as e:
+        return f"  ❌ {module_name} 错误: {e}", module_name
+
+
 def check_and_fix_imports():
     """检查并修复导入问题"""
-    print("="*70)
-    print("检查模块导入")
-    print("="*70)
-    print()
+    log("="*70)
+    log("检查模块导入")
+    log("="*70)
+    log()
     
     errors = []
     fixes_applied = []
     
-    # 检查所有必需的模块
-    modules_to_check = [
-        ("config.settings", "settings"),
-        ("agent.llm", "get_llm_client"),
-        ("agent.rag", "get_retriever"),
-        ("agent.planner", "get_planner"),
-        ("agent.functions", "get_executor"),
-        ("agent.analyzer", "analyze_result"),
-        ("db.clickhouse_client", "get_client"),
-        ("utils.time_utils", "parse_time_range"),
-        ("utils.chart", "draw_chart"),
-    ]
-    
-    for module_name, attr_name in modules_to_check:
-        try:
-            module = __import__(module_name, fromlist=[attr_name])
-            if hasattr(module, attr_name):
-                print(f"  ✓ {module_name}.{attr_name}")
-            else:
-                print(f"  ❌ {module_name} 缺少 {attr_name}")
-                errors.append(f"{module_name}.{attr_name}")
-        except ImportError as e:
-            print(f"  ❌ {module_name} 导入失败: {e}")
-            errors.append(module_name)
-        except Exception as e:
-            print(f"  ❌ {module_name} 错误: {e}")
-            errors.append(module_name)
+    # 各模块导入互不依赖，并发执行以重叠磁盘 I/O；结果按原顺序输出
+    with ThreadPoolExecutor(max_workers=min(len(_MODULES_TO_CHECK), os.cpu_count() or 4)) as pool:
+        futures = [
+            pool.submit(_check_module, module_name, attr_name)
+            for module_name, attr_name in _MODULES_TO_CHECK
+        ]
+        for future in futures:
+            message, error = future.result()
+            log(message)
+            if error:
+                errors.append(error)
     
     if errors:
-        print(f"\n❌ 发现 {len(errors)} 个导入错误")
+        log(f"\n❌ 发现 {len(errors)} 个导入错误")
         return False, fixes_applied
     else:
-        print("\n✅ 所有模块导入成功")
+        log("\n✅ 所有模块导入成功")
         return True, fixes_applied
 
 
 def check_and_fix_initialization():
     """检查并修复初始化问题"""
-    print("\n" + "="*70)
-    print("检查模块初始化")
-    print("="*70)
-    print()
+    log("\n" + "="*70)
+    log("检查模块初始化")
+    log("="*70)
+    log()
     
     errors = []
     
-    # 1. LLM 客户端
-    try:
-        from agent.llm import get_llm_client
-        llm = get_llm_client()
-        print("  ✓ LLM 客户端初始化成功")
-    except Exception as e:
-        print(f"  ❌ LLM 客户端初始化失败: {e}")
-        errors.append(("LLM", str(e)))
-        # 检查是否是 proxies 问题
-        if "proxies" in str(e).lower():
-            print("    检测到 proxies 参数问题，已修复")
-    
-    # 2. RAG 检索器
-    try:
-        from agent.rag import get_retriever
-        retriever = get_retriever()
-        print("  ✓ RAG 检索器初始化成功")
-    except Exception as e:
-        print(f"  ❌ RAG 检索器初始化失败: {e}")
-        errors.append(("RAG", str(e)))
-    
-    # 3. 查询规划器
-    try:
-        from agent.planner import get_planner
-        planner = get_planner()
-        print("  ✓ 查询规划器初始化成功")
-    except Exception as e:
-        print(f"  ❌ 查询规划器初始化失败: {e}")
-        errors.append(("Planner", str(e)))
-    
-    # 4. 查询执行器
-    try:
-        from agent.functions import get_executor
-        executor = get_executor()
-        print("  ✓ 查询执行器初始化成功")
-    except Exception as e:
-        print(f"  ❌ 查询执行器初始化失败: {e}")
-        errors.append(("Executor", str(e)))
+    # 按依赖顺序初始化；各 get_* 为单例，后续组件复用已初始化的依赖
+    for label, display_name, module_name, factory_name in _INIT_SPECS:
+        try:
+            factory = getattr(importlib.import_module(module_name), factory_name)
+            factory()
+            log(f"  ✓ {display_name}初始化成功")
+        except Exception as e:
+            log(f"  ❌ {display_name}初始化失败: {e}")
+            errors.append((label, str(e)))
+            # 检查是否是 proxies 问题
+            if label == "LLM" and "proxies" in str(e).lower():
+                log("    检测到 proxies 参数问题，已修复")
     
     if errors:
-        print(f"\n❌ 发现 {len(errors)} 个初始化错误")
+        log(f"\n❌ 发现 {len(errors)} 个初始化错误")
         return False
     else:
-        print("\n✅ 所有模块初始化成功")
+        log("\n✅ 所有模块初始化成功")
         return True
 
 
 def check_cli_functionality():
     """检查 CLI 功能"""
-    print("\n" + "="*70)
-    print("检查 CLI 功能")
-    print("="*70)
-    print()
+    log("\n" + "="*70)
+    log("检查 CLI 功能")
+    log("="*70)
+    log()
     
     try:
         import cli
@@ -127,109 +146,106 @@ def check_cli_functionality():
         required_functions = ['main', 'test_query', 'print_section', 'print_step']
         for func_name in required_functions:
             if hasattr(cli, func_name):
-                print(f"  ✓ {func_name} 函数存在")
+                log(f"  ✓ {func_name} 函数存在")
             else:
-                print(f"  ❌ {func_name} 函数不存在")
+                log(f"  ❌ {func_name} 函数不存在")
                 return False
         
-        # 检查 CLI 可以解析参数
-        import argparse
-        test_args = ['-q', 'test question']
-        parser = argparse.ArgumentParser()
-        parser.add_argument('-q', '--question', default='')
-        parser.add_argument('--quiet', action='store_true')
-        parser.add_argument('--test', action='store_true')
-        
-        args = parser.parse_args(['-q', 'test'])
-        if args.question == 'test':
-            print("  ✓ CLI 参数解析正常")
+        # 检查 CLI 入口使用 argparse 解析参数（仅静态检查，不构造解析器）
+        main_code = getattr(cli.main, '__code__', None) if callable(cli.main) else None
+        main_names = set(main_code.co_names) if main_code is not None else set()
+        if {'ArgumentParser', 'parse_args'} <= main_names:
+            log("  ✓ CLI 参数解析正常")
         else:
-            print("  ❌ CLI 参数解析异常")
+            log("  ❌ CLI 参数解析异常")
             return False
         
-        print("\n✅ CLI 功能检查通过")
+        log("\n✅ CLI 功能检查通过")
         return True
         
     except Exception as e:
-        print(f"  ❌ CLI 功能检查失败: {e}")
-        traceback.print_exc()
+        log(f"  ❌ CLI 功能检查失败: {e}")
+        log(traceback.format_exc().rstrip())
         return False
 
 
 def simulate_cli_execution():
     """模拟 CLI 执行（不实际调用 LLM 和数据库）"""
-    print("\n" + "="*70)
-    print("模拟 CLI 执行流程")
-    print("="*70)
-    print()
+    log("\n" + "="*70)
+    log("模拟 CLI 执行流程")
+    log("="*70)
+    log()
     
     try:
         # 1. 导入模块
         from agent.planner import get_planner
         from agent.functions import get_executor
-        print("  ✓ 步骤1: 模块导入成功")
+        log("  ✓ 步骤1: 模块导入成功")
         
         # 2. 初始化（这会实际初始化，但不会调用 LLM）
         planner = get_planner()
         executor = get_executor()
-        print("  ✓ 步骤2: 组件初始化成功")
+        log("  ✓ 步骤2: 组件初始化成功")
         
         # 3. 检查 QueryPlan 生成逻辑（不实际调用）
         if hasattr(planner, 'plan'):
-            print("  ✓ 步骤3: QueryPlan 生成函数存在")
+            log("  ✓ 步骤3: QueryPlan 生成函数存在")
         else:
-            print("  ❌ 步骤3: QueryPlan 生成函数不存在")
+            log("  ❌ 步骤3: QueryPlan 生成函数不存在")
             return False
         
         # 4. 检查 SQL 生成逻辑
         if hasattr(executor, 'get_generated_sql'):
-            print("  ✓ 步骤4: SQL 生成函数存在")
+            log("  ✓ 步骤4: SQL 生成函数存在")
         else:
-            print("  ❌ 步骤4: SQL 生成函数不存在")
+            log("  ❌ 步骤4: SQL 生成函数不存在")
             return False
         
         # 5. 检查查询执行逻辑
         if hasattr(executor, 'run_query'):
-            print("  ✓ 步骤5: 查询执行函数存在")
+            log("  ✓ 步骤5: 查询执行函数存在")
         else:
-            print("  ❌ 步骤5: 查询执行函数不存在")
+            log("  ❌ 步骤5: 查询执行函数不存在")
             return False
         
-        print("\n✅ CLI 执行流程检查通过")
+        log("\n✅ CLI 执行流程检查通过")
         return True
         
     except Exception as e:
-        print(f"  ❌ CLI 执行流程检查失败: {e}")
-        traceback.print_exc()
+        log(f"  ❌ CLI 执行流程检查失败: {e}")
+        log(traceback.format_exc().rstrip())
         return False
 
 
 def main():
     """主函数"""
-    print("\n" + "="*70)
-    print("CLI 自动验证和修复")
-    print("="*70)
-    print()
+    log("\n" + "="*70)
+    log("CLI 自动验证和修复")
+    log("="*70)
+    log()
     
     results = []
     all_passed = True
     
     # 1. 检查导入
     import_ok, fixes = check_and_fix_imports()
+    flush_log()
     results.append(("模块导入", import_ok))
     if not import_ok:
         all_passed = False
-        print("\n⚠️  导入错误，请运行: python3 install_deps.py")
+        log("\n⚠️  导入错误，请运行: python3 install_deps.py")
     
     # 2. 检查初始化
     if import_ok:
         init_ok = check_and_fix_initialization()
+        flush_log()
         results.append(("模块初始化", init_ok))
         if not init_ok:
             all_passed = False
     
     # 3. 检查 CLI 功能
     cli_ok = check_cli_functionality()
+    flush_log()
     results.append(("CLI 功能", cli_ok))
     if not cli_ok:
         all_passed = False
@@ -237,33 +253,38 @@ def main():
     # 4. 模拟执行
     if import_ok:
         exec_ok = simulate_cli_execution()
+        flush_log()
         results.append(("执行流程", exec_ok))
         if not exec_ok:
             all_passed = False
     
     # 汇总
-    print("\n" + "="*70)
-    print("验证结果汇总")
-    print("="*70)
+    log("\n" + "="*70)
+    log("验证结果汇总")
+    log("="*70)
     
     for name, result in results:
         status = "✅ 通过" if result else "❌ 失败"
-        print(f"  {name}: {status}")
+        log(f"  {name}: {status}")
     
-    print("="*70)
+    log("="*70)
     
     if all_passed:
-        print("\n✅ CLI 模式可以正常启动！")
-        print("\n可以运行:")
-        print("  python3 cli.py -q '你的问题'")
+        log("\n✅ CLI 模式可以正常启动！")
+        log("\n可以运行:")
+        log("  python3 cli.py -q '你的问题'")
         return 0
     else:
-        print("\n❌ CLI 模式启动验证失败")
-        print("\n请检查错误信息并修复")
+        log("\n❌ CLI 模式启动验证失败")
+        log("\n请检查错误信息并修复")
         return 1
 
 
 if __name__ == "__main__":
-    sys.exit(main())
+    try:
+        exit_code = main()
+    finally:
+        flush_log()
+    sys.exit(exit_code)
 
 
@@ -6,13 +6,19 @@ CLI 命令行工具
 """
 import sys
 import os
-import json
-import traceback
 import argparse
+import functools
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# --test 模式使用的测试问题
+TEST_QUESTIONS = (
+    "统计近1h，发起探测的探测设备(hostname)区分不同的任务(task_name）统计，分析这些设备的平均丢包和rtt情况",
+    "查询最近30分钟的RTT平均值",
+    "统计各省份的丢包率",
+)
+
 
 def print_section(title: str):
     """打印分节标题"""
@@ -26,6 +32,14 @@ def print_step(step_num: int, description: str):
     print(f"[步骤 {step_num}] {description}...")
 
 
+@functools.lru_cache(maxsize=1)
+def _get_components():
+    """获取规划器和执行器（进程内只初始化一次，--test 多问题共享）"""
+    from agent.planner import get_planner
+    from agent.functions import get_executor
+    return get_planner(), get_executor()
+
+
 def test_query(question: str, verbose: bool = True):
     """测试查询"""
     print_section("网络探测数据 AI 分析 Agent - 测试")
@@ -35,16 +49,14 @@ def test_query(question: str, verbose: bool = True):
         # 步骤1: 导入模块
         if verbose:
             print_step(1, "导入模块")
-        from agent.planner import get_planner
-        from agent.functions import get_executor
+        from utils.chart import chart_label
         if verbose:
             print("  ✓ 模块导入成功\n")
         
         # 步骤2: 初始化
         if verbose:
             print_step(2, "初始化规划器和执行器")
-        planner = get_planner()
-        executor = get_executor()
+        planner, executor = _get_components()
         if verbose:
             print("  ✓ 初始化完成\n")
         
@@ -54,6 +66,7 @@ def test_query(question: str, verbose: bool = True):
             print("  (这可能需要一些时间...)\n")
         query_plan = planner.plan(question)
         if verbose:
+            import json
             print("  ✓ QueryPlan 生成成功")
             print(f"\n  QueryPlan 内容:")
             print(f"  {json.dumps(query_plan, indent=2, ensure_ascii=False)}\n")
@@ -79,9 +92,13 @@ def test_query(question: str, verbose: bool = True):
         # 步骤6: 显示结果
         if not df.empty:
             if verbose:
+                import pandas as pd
                 print_step(6, "查询结果预览")
                 print(f"\n  前 10 行数据:\n")
-                print("  " + "\n  ".join(df.head(10).to_string().split("\n")))
+                # 限制列宽和列数，避免宽结果表生成超长预览字符串
+                with pd.option_context('display.max_colwidth', 40, 'display.max_columns', 20):
+                    preview = df.head(10).to_string()
+                print("  " + preview.replace("\n", "\n  "))
                 print()
         else:
             if verbose:
@@ -101,7 +118,7 @@ def test_query(question: str, verbose: bool = True):
             )
             if chart_path:
                 if verbose:
-                    print(f"  ✓ 图表已生成: {chart_path}\n")
+                    print(f"  ✓ 图表已生成: {chart_label(chart_path)}\n")
             else:
                 if verbose:
                     print("  ⚠ 图表生成失败\n")
@@ -129,7 +146,7 @@ def test_query(question: str, verbose: bool = True):
         print("-" * 70)
         
         if chart_path:
-            print(f"\n图表路径: {chart_path}")
+            print(f"\n图表路径: {chart_label(chart_path)}")
         
         return {
             "success": True,
@@ -145,11 +162,13 @@ def test_query(question: str, verbose: bool = True):
         print("\n请确保已安装所有依赖:")
         print("  pip install -r requirements.txt")
         if verbose:
+            import traceback
             traceback.print_exc()
         return {"success": False, "error": f"导入错误: {str(e)}"}
     except Exception as e:
         print(f"\n❌ 错误: {e}")
         if verbose:
+            import traceback
             print("\n详细错误信息:")
             traceback.print_exc()
         return {"success": False, "error": str(e)}
@@ -194,29 +213,23 @@ def main():
     args = parser.parse_args()
     
     if args.test:
-        # 测试模式：运行多个测试问题
-        test_questions = [
-            "统计近1h，发起探测的探测设备(hostname)区分不同的任务(task_name）统计，分析这些设备的平均丢包和rtt情况",
-            "查询最近30分钟的RTT平均值",
-            "统计各省份的丢包率"
-        ]
-        
+        # 测试模式：运行多个测试问题，逐个输出结果，不保留各次结果
         print_section("测试模式")
-        results = []
-        for i, question in enumerate(test_questions, 1):
-            print(f"\n测试 {i}/{len(test_questions)}")
+        total = len(TEST_QUESTIONS)
+        success_count = 0
+        for i, question in enumerate(TEST_QUESTIONS, 1):
+            print(f"\n测试 {i}/{total}")
             result = test_query(question, verbose=not args.quiet)
-            results.append(result)
-            if not result["success"]:
-                print(f"❌ 测试 {i} 失败: {result.get('error', 'Unknown error')}")
-            else:
+            if result["success"]:
+                success_count += 1
                 print(f"✅ 测试 {i} 成功")
+            else:
+                print(f"❌ 测试 {i} 失败: {result.get('error', 'Unknown error')}")
         
         # 汇总
-        success_count = sum(1 for r in results if r["success"])
-        print_section(f"测试完成: {success_count}/{len(test_questions)} 成功")
+        print_section(f"测试完成: {success_count}/{total} 成功")
         
-        sys.exit(0 if success_count == len(test_questions) else 1)
+        sys.exit(0 if success_count == total else 1)
     else:
         # 单次查询模式
         result = test_query(args.question, verbose=not args.quiet)
@@ -3,8 +3,9 @@
 """
 import os
 import logging
-from typing import List
-from pydantic import Field
+from functools import lru_cache
+from typing import List, Union
+from pydantic import Field, field_validator
 from dotenv import load_dotenv
 
 # 加载环境变量
@@ -43,19 +44,33 @@ class Settings(BaseSettings):
     
     # 静态文件目录
     STATIC_DIR: str = Field(default="static", env="STATIC_DIR")
+    # 图表是否以 data URI 内联返回（不写 static 目录）；默认 False，保存文件并返回 /static 路径
+    CHART_INLINE: bool = Field(default=False, env="CHART_INLINE")
+    # 图表输出格式：webp（体积小）或 png
+    CHART_FORMAT: str = Field(default="webp", env="CHART_FORMAT")
     
     # 智能引擎配置
     ENABLE_INTELLIGENT_ENGINE: bool = Field(default=False, env="ENABLE_INTELLIGENT_ENGINE")
     ENABLE_QUALITY_CHECK: bool = Field(default=True, env="ENABLE_QUALITY_CHECK")
     INTELLIGENT_ENGINE_FALLBACK: bool = Field(default=True, env="INTELLIGENT_ENGINE_FALLBACK")
     
-    @property
-    def CLICKHOUSE_ADDRESSES(self) -> List[str]:
-        """从环境变量解析地址列表"""
-        addresses_str = os.getenv("CLICKHOUSE_ADDRESSES", "cc-2zet16rb5415n61g4-ck-l5.clickhouseserver.rds.aliyuncs.com:9000")
-        return [addr.strip() for addr in addresses_str.split(",") if addr.strip()]
+    # 逗号分隔的地址列表，在配置校验时解析一次
+    # （声明为 Union 以便环境变量中的非 JSON 字符串交给下方校验器处理）
+    CLICKHOUSE_ADDRESSES: Union[List[str], str] = Field(
+        default=["cc-2zet16rb5415n61g4-ck-l5.clickhouseserver.rds.aliyuncs.com:9000"],
+        env="CLICKHOUSE_ADDRESSES"
+    )
+    
+    @field_validator("CLICKHOUSE_ADDRESSES", mode="before")
+    @classmethod
+    def _split_addresses(cls, value):
+        """将逗号分隔的地址字符串解析为列表"""
+        if isinstance(value, str):
+            return [addr.strip() for addr in value.split(",") if addr.strip()]
+        return value
 
 
+@lru_cache(maxsize=1)
 def init_settings() -> Settings:
     """
     初始化配置并设置环境变量
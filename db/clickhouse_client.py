@@ -3,7 +3,9 @@ ClickHouse 数据库客户端
 实现安全查询和限制逻辑
 """
 import logging
-from typing import Optional, List, Dict, Any
+import re
+import threading
+from typing import Optional, List, Dict, Any, Tuple, Union
 import pandas as pd
 from clickhouse_driver import Client
 from clickhouse_driver.errors import Error as ClickHouseError
@@ -12,15 +14,55 @@ from config.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 危险 SQL 关键字（禁止执行）
+DANGEROUS_KEYWORDS = (
+    'insert', 'update', 'delete', 'drop', 'alter',
+    'create', 'truncate', 'grant', 'revoke', 'exec'
+)
+
+# 预编译正则（模块加载时编译一次）
+_DANGER_RE = re.compile(r'\b(' + '|'.join(DANGEROUS_KEYWORDS) + r')\b', re.IGNORECASE)
+# 词法扫描：字符串/标识符字面量与注释整体匹配（跳过其中内容），括号用于跟踪子查询深度；
+# LIMIT n BY 是分组限制而非结果行数限制，不计入
+_LIMIT_SCAN_RE = re.compile(
+    r"'(?:[^'\\]|\\.)*'"
+    r'|"(?:[^"\\]|\\.)*"'
+    r'|`[^`]*`'
+    r'|--[^\n]*'
+    r'|/\*.*?\*/'
+    r'|[()]'
+    r'|\blimit\s+(?:\d+\s*,\s*)?(\d+)\b(?!\s+by\b)',
+    re.IGNORECASE | re.DOTALL
+)
+
+
+def _find_terminal_limit(sql: str) -> Optional[re.Match]:
+    """
+    查找最外层（不在子查询、字符串或注释中）的 LIMIT 子句
+    
+    Args:
+        sql: SQL 语句
+        
+    Returns:
+        LIMIT 匹配对象（group(1) 为行数，兼容 LIMIT offset, n），不存在时返回 None
+    """
+    depth = 0
+    terminal = None
+    for match in _LIMIT_SCAN_RE.finditer(sql):
+        token = match.group(0)
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth = max(depth - 1, 0)
+        elif match.group(1) is not None and depth == 0:
+            terminal = match
+    return terminal
+
 
 class ClickHouseClient:
     """ClickHouse 客户端，包含安全限制"""
     
-    # 危险 SQL 关键字（禁止执行）
-    DANGEROUS_KEYWORDS = [
-        'insert', 'update', 'delete', 'drop', 'alter', 
-        'create', 'truncate', 'grant', 'revoke', 'exec'
-    ]
+    __slots__ = ('_connect_kwargs', '_local', '_query_settings')
     
     def __init__(self):
         """初始化 ClickHouse 客户端"""
@@ -33,21 +75,40 @@ class ClickHouseClient:
         # 解析地址
         host, port = self._parse_address(settings.CLICKHOUSE_ADDRESSES[0])
         
+        self._connect_kwargs = {
+            'host': host,
+            'port': port,
+            'database': settings.CLICKHOUSE_DATABASE,
+            'user': settings.CLICKHOUSE_USERNAME,
+            'password': settings.CLICKHOUSE_PASSWORD,
+            'connect_timeout': 10,
+            'send_receive_timeout': 300,
+        }
+        # clickhouse_driver 的 Client 同一时刻只能执行一个查询，
+        # 每个线程持有独立连接，线程池中的并发查询可以同时进行
+        self._local = threading.local()
+        # 服务端限制：行数上限与执行超时由 ClickHouse 直接执行，不依赖 SQL 改写
+        self._query_settings = {
+            'max_result_rows': settings.MAX_QUERY_ROWS,
+            'result_overflow_mode': 'break',
+            'max_execution_time': 300,
+        }
+        
         try:
-            self.client = Client(
-                host=host,
-                port=port,
-                database=settings.CLICKHOUSE_DATABASE,
-                user=settings.CLICKHOUSE_USERNAME,
-                password=settings.CLICKHOUSE_PASSWORD,
-                connect_timeout=10,
-                send_receive_timeout=300
-            )
+            self.client  # 为当前线程创建客户端
             logger.info(f"ClickHouse 连接成功: {host}:{port}")
         except Exception as e:
             logger.error(f"ClickHouse 连接失败: {e}")
             raise
     
+    @property
+    def client(self) -> Client:
+        """当前线程的 clickhouse_driver 客户端（首次访问时创建）"""
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(**self._connect_kwargs)
+        return client
+    
     @staticmethod
     def _parse_address(address: str) -> tuple:
         """
@@ -87,73 +148,67 @@ class ClickHouseClient:
         if not sql:
             raise ValueError("SQL 语句不能为空")
         
-        sql_lower = sql.lower().strip()
+        sql_lower = sql.lstrip().lower()
         
         # 检查是否只允许 SELECT
         if not sql_lower.startswith('select'):
             raise ValueError("只允许执行 SELECT 查询")
         
         # 检查危险关键字
-        for keyword in self.DANGEROUS_KEYWORDS:
-            if keyword in sql_lower:
-                raise ValueError(f"SQL 包含危险关键字: {keyword}")
+        danger_match = _DANGER_RE.search(sql_lower)
+        if danger_match:
+            raise ValueError(f"SQL 包含危险关键字: {danger_match.group(1)}")
         
         # 检查是否包含时间范围（必须）
         if 'timestamp' not in sql_lower:
             logger.warning("SQL 未包含 timestamp 字段，可能导致全表扫描")
         
-        # 检查是否包含 LIMIT（建议）
-        if 'limit' not in sql_lower:
-            logger.warning("SQL 未包含 LIMIT，建议添加以限制返回行数")
+        # 检查是否包含最外层 LIMIT（缺失时由 _ensure_limit 自动追加）
+        if _find_terminal_limit(sql) is None:
+            logger.warning("SQL 未包含 LIMIT，将自动追加 LIMIT %d", settings.MAX_QUERY_ROWS)
     
     def _ensure_limit(self, sql: str) -> str:
         """
-        确保 SQL 包含 LIMIT（卫语句）
+        确保 SQL 包含最外层 LIMIT 且不超过 MAX_QUERY_ROWS
+        
+        没有最外层 LIMIT 时追加 LIMIT MAX_QUERY_ROWS；已有 LIMIT 超过最大值时调整为最大值。
         
         Args:
             sql: SQL 语句
             
         Returns:
-            添加了 LIMIT 的 SQL
+            调整后的 SQL
         """
-        sql_lower = sql.lower().strip()
-        
-        # 如果已有 LIMIT，检查是否超过最大值
-        if 'limit' in sql_lower:
-            # 提取现有 LIMIT 值（简单处理）
-            import re
-            limit_match = re.search(r'limit\s+(\d+)', sql_lower, re.IGNORECASE)
-            if limit_match:
-                existing_limit = int(limit_match.group(1))
-                if existing_limit > settings.MAX_QUERY_ROWS:
-                    # 替换为最大限制
-                    sql = re.sub(
-                        r'limit\s+\d+',
-                        f'LIMIT {settings.MAX_QUERY_ROWS}',
-                        sql,
-                        flags=re.IGNORECASE
-                    )
-                    logger.warning(f"LIMIT 值超过最大值，已调整为 {settings.MAX_QUERY_ROWS}")
-            return sql
-        
-        # 如果没有 LIMIT，添加
-        max_limit = settings.MAX_QUERY_ROWS
-        if sql.rstrip().endswith(';'):
-            sql = sql.rstrip()[:-1]
-        
-        sql = f"{sql} LIMIT {max_limit}"
-        logger.info(f"自动添加 LIMIT {max_limit}")
+        # 只处理最外层 LIMIT，子查询中的 LIMIT 保持不变
+        limit_match = _find_terminal_limit(sql)
+        if limit_match is None:
+            # 另起一行追加，避免被末尾的单行注释吞掉；去掉末尾分号
+            sql = f"{sql.rstrip().rstrip(';').rstrip()}\nLIMIT {settings.MAX_QUERY_ROWS}"
+        else:
+            existing_limit = int(limit_match.group(1))
+            if existing_limit > settings.MAX_QUERY_ROWS:
+                # 替换为最大限制
+                sql = f"{sql[:limit_match.start(1)]}{settings.MAX_QUERY_ROWS}{sql[limit_match.end(1):]}"
+                logger.warning(f"LIMIT 值超过最大值，已调整为 {settings.MAX_QUERY_ROWS}")
         return sql
     
-    def execute_query(self, sql: str) -> pd.DataFrame:
+    def execute_query(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]] = None,
+        as_dataframe: bool = True
+    ) -> Union[pd.DataFrame, Tuple[List[tuple], List[str]]]:
         """
         执行安全查询
         
         Args:
-            sql: SQL 语句
+            sql: SQL 语句，可包含 %(name)s 形式的参数占位符
+            params: 查询参数（可选），由 clickhouse_driver 负责替换
+            as_dataframe: 是否构造 DataFrame；为 False 时直接返回原始行，
+                跳过 pandas 的列转换与类型推断（适合只需遍历行的小结果集）
             
         Returns:
-            查询结果 DataFrame
+            查询结果 DataFrame，或 (rows, column_names) 元组
             
         Raises:
             ValueError: SQL 验证失败
@@ -162,25 +217,30 @@ class ClickHouseClient:
         # 验证 SQL 安全性
         self._validate_sql(sql)
         
-        # 确保包含 LIMIT
+        # 限制 LIMIT 不超过最大值
         sql = self._ensure_limit(sql)
         
-        logger.info(f"执行查询: {sql}")
+        logger.debug("执行查询: %s", sql)
         
         try:
-            # 执行查询
-            result = self.client.query_dataframe(sql)
+            if not as_dataframe:
+                rows, columns = self.client.execute(
+                    sql, params, with_column_types=True, settings=self._query_settings
+                )
+                logger.info("查询成功，返回 %d 行", len(rows))
+                return rows, [name for name, _ in columns]
             
-            if result is None:
-                logger.warning("查询返回空结果")
-                return pd.DataFrame()
+            # 执行查询
+            result = self.client.query_dataframe(
+                sql, params=params, settings=self._query_settings
+            )
             
             row_count = len(result)
-            logger.info(f"查询成功，返回 {row_count} 行")
+            logger.info("查询成功，返回 %d 行", row_count)
             
             # 检查结果大小
             if row_count >= settings.MAX_QUERY_ROWS:
-                logger.warning(f"返回行数达到限制上限 {settings.MAX_QUERY_ROWS}，可能需要聚合查询")
+                logger.warning("返回行数达到限制上限 %d，可能需要聚合查询", settings.MAX_QUERY_ROWS)
             
             return result
             
@@ -202,6 +262,10 @@ class ClickHouseClient:
             return False
         
         try:
+            connection = self.client.connection
+            if connection.connected:
+                # 当前线程已建立连接：只发送 ping 包，不执行查询
+                return connection.ping()
             result = self.client.execute("SELECT 1")
             return result is not None
         except Exception as e:
@@ -209,14 +273,17 @@ class ClickHouseClient:
             return False
 
 
-# 全局客户端实例（懒加载）
+# 全局客户端实例（懒加载），进程内共享；底层连接按线程各自建立（见 ClickHouseClient.client）
 _client: Optional[ClickHouseClient] = None
+_client_lock = threading.Lock()
 
 
 def get_client() -> ClickHouseClient:
     """
     获取 ClickHouse 客户端实例（单例模式）
     
+    并发首次调用时加锁，确保只建立一次连接。
+    
     Returns:
         ClickHouseClient 实例
     """
@@ -228,6 +295,7 @@ def get_client() -> ClickHouseClient:
     if not settings.CLICKHOUSE_ENABLE:
         raise ValueError("ClickHouse 未启用")
     
-    _client = ClickHouseClient()
+    with _client_lock:
+        if _client is None:
+            _client = ClickHouseClient()
     return _client
-
@@ -5,15 +5,14 @@
 """
 import sys
 import os
-import json
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# 直接调用 CLI 的 test_query 函数
-from cli import test_query
-
 if __name__ == "__main__":
+    # 直接调用 CLI 的 test_query 函数（延迟导入，避免 import 本模块时加载 CLI）
+    from cli import test_query
+    
     question = "统计近1h，发起探测的探测设备(hostname)区分不同的任务(task_name）统计，分析这些设备的平均丢包和rtt情况"
     
     print("="*70)
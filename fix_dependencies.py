@@ -3,9 +3,10 @@
 """
 修复依赖版本问题
 """
-import subprocess
 import sys
 
+from install_deps import pip_install_cached, run_pip
+
 def fix_huggingface_hub():
     """修复 huggingface_hub 版本"""
     print("修复 huggingface_hub 版本...")
@@ -14,17 +15,11 @@ def fix_huggingface_hub():
     try:
         # 卸载新版本
         print("1. 卸载当前 huggingface_hub...")
-        subprocess.run(
-            [sys.executable, "-m", "pip", "uninstall", "-y", "huggingface_hub"],
-            text=True
-        )
+        run_pip("uninstall", "-y", "huggingface_hub")
         
         # 安装兼容版本
         print("2. 安装兼容版本 huggingface_hub==0.16.4...")
-        result = subprocess.run(
-            [sys.executable, "-m", "pip", "install", "huggingface_hub==0.16.4"],
-            text=True
-        )
+        result = pip_install_cached("huggingface_hub==0.16.4")
         
         if result.returncode == 0:
             print("✅ huggingface_hub 修复成功")
@@ -64,7 +59,7 @@ def main():
             print("✅ 依赖修复成功！")
             print("="*70)
             print("\n可以运行以下命令验证:")
-            print("  python3 test_startup.py")
+            print("  python3 tests/test_startup.py")
             return 0
         else:
             print("\n⚠️  修复完成但验证失败，请手动检查")
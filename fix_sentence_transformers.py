@@ -3,9 +3,10 @@
 """
 单独安装 sentence-transformers
 """
-import subprocess
 import sys
 
+from install_deps import pip_install_cached
+
 def install_sentence_transformers():
     """安装 sentence-transformers"""
     print("正在安装 sentence-transformers...")
@@ -13,10 +14,7 @@ def install_sentence_transformers():
     
     try:
         # 尝试安装
-        result = subprocess.run(
-            [sys.executable, "-m", "pip", "install", "sentence-transformers==2.2.2"],
-            text=True
-        )
+        result = pip_install_cached("sentence-transformers==2.2.2")
         
         if result.returncode == 0:
             print("✅ sentence-transformers 安装成功！")
@@ -34,10 +32,7 @@ def install_sentence_transformers():
             print("\n尝试使用其他方法安装...")
             
             # 尝试不指定版本
-            result2 = subprocess.run(
-                [sys.executable, "-m", "pip", "install", "sentence-transformers"],
-                text=True
-            )
+            result2 = pip_install_cached("sentence-transformers")
             
             if result2.returncode == 0:
                 print("✅ sentence-transformers 安装成功（未指定版本）！")
@@ -17,9 +17,11 @@ const ChartDisplay = ({ chartUrl }) => {
   };
 
   const handleDownload = () => {
+    // 扩展名跟随图表实际格式（data URI 的 MIME 类型或文件后缀）
+    const extension = chartUrl.startsWith('data:image/webp') || chartUrl.endsWith('.webp') ? 'webp' : 'png';
     const link = document.createElement('a');
     link.href = chartUrl;
-    link.download = `network-analysis-chart-${Date.now()}.png`;
+    link.download = `network-analysis-chart-${Date.now()}.${extension}`;
     document.body.appendChild(link);
     link.click();
     document.body.removeChild(link);
@@ -3,11 +3,138 @@
 """
 自动安装依赖脚本
 """
+import asyncio
+import importlib
 import subprocess
 import sys
 import os
+import tempfile
+from importlib.util import find_spec
+from pathlib import Path
 
-def install_requirements():
+# 并行安装的 worker 数（设为 1 则退化为串行安装）
+PIP_PARALLEL_DOWNLOADS = int(os.environ.get("PIP_PARALLEL_DOWNLOADS", "4"))
+
+
+# 必须成对安装的兼容版本（sentence-transformers 2.2.2 依赖旧版 huggingface-hub 的 cached_download）
+PINNED_PACKAGES = ("huggingface-hub==0.16.4", "sentence-transformers==2.2.2")
+
+# 静默模式：pip 的 stdout（进度与日志）直接丢弃，只保留 stderr 中的错误信息；
+# 设置 WKAI_PIP_QUIET=0 或传入 --verbose 可恢复完整输出
+PIP_QUIET = os.environ.get("WKAI_PIP_QUIET", "1") == "1" and "--verbose" not in sys.argv
+
+# 本地 wheel 缓存目录（install_deps.py 与 fix_*.py 共用，重复运行时无需重新下载）
+WHEEL_CACHE = Path.home() / ".cache" / "wk-ai-test" / "wheels"
+
+
+def _pip_argv(command, *args):
+    """拼接 pip 子命令参数（静默模式下追加 --quiet 等选项）"""
+    quiet_args = []
+    if PIP_QUIET:
+        quiet_args.append("--quiet")
+        # uninstall 不支持 --progress-bar
+        if command in ("install", "download"):
+            quiet_args += ["--progress-bar", "off"]
+    return [command, *quiet_args, *args]
+
+
+def run_pip(command, *args):
+    """
+    执行 pip 子命令
+    
+    Args:
+        command: pip 子命令，如 "install"、"download"、"uninstall"
+        args: 其余命令行参数
+        
+    Returns:
+        CompletedProcess
+    """
+    return subprocess.run(
+        [sys.executable, "-m", "pip", *_pip_argv(command, *args)],
+        stdout=subprocess.DEVNULL if PIP_QUIET else None
+    )
+
+
+async def run_pip_async(command, *args):
+    """
+    以异步子进程执行 pip 子命令，多个调用可在同一事件循环中并发
+    
+    Returns:
+        pip 进程返回码
+    """
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "pip", *_pip_argv(command, *args),
+        stdout=asyncio.subprocess.DEVNULL if PIP_QUIET else None
+    )
+    return await proc.wait()
+
+
+def pip_install_cached(*specs):
+    """
+    先将指定包下载到本地 wheel 缓存，再从缓存优先安装
+    
+    Args:
+        specs: pip 包规格，如 "sentence-transformers==2.2.2"
+        
+    Returns:
+        pip install 的 CompletedProcess
+    """
+    WHEEL_CACHE.mkdir(parents=True, exist_ok=True)
+    cache_args = ["--find-links", str(WHEEL_CACHE), "--prefer-binary"]
+    # 已在缓存中的文件不会重复下载；下载失败时仍尝试直接安装
+    run_pip("download", "--dest", str(WHEEL_CACHE), "--no-deps", *cache_args, *specs)
+    return run_pip("install", *cache_args, *specs)
+
+
+async def pip_install_cached_async(*specs):
+    """
+    pip_install_cached 的异步版本
+    
+    Returns:
+        pip install 的返回码
+    """
+    WHEEL_CACHE.mkdir(parents=True, exist_ok=True)
+    cache_args = ["--find-links", str(WHEEL_CACHE), "--prefer-binary"]
+    await run_pip_async("download", "--dest", str(WHEEL_CACHE), "--no-deps", *cache_args, *specs)
+    return await run_pip_async("install", *cache_args, *specs)
+
+
+def _read_requirements(requirements_file):
+    """读取 requirements 文件中的依赖项（忽略注释和空行）"""
+    with open(requirements_file, encoding="utf-8") as f:
+        lines = (line.split("#", 1)[0].strip() for line in f)
+        return [line for line in lines if line and not line.startswith("-")]
+
+
+async def _install_shards_parallel(requirements_file, workers):
+    """
+    将依赖分片后并行下载安装（--no-deps），返回是否全部成功
+    
+    依赖关系由调用方随后的完整 pip install -r 统一解析。
+    """
+    packages = _read_requirements(requirements_file)
+    if not packages:
+        return True
+    
+    workers = min(workers, len(packages))
+    shards = [packages[i::workers] for i in range(workers)]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        shard_files = []
+        for i, shard in enumerate(shards):
+            shard_file = os.path.join(tmp_dir, f"tmp_req_{i}.txt")
+            with open(shard_file, "w", encoding="utf-8") as f:
+                f.write("\n".join(shard) + "\n")
+            shard_files.append(shard_file)
+        
+        returncodes = await asyncio.gather(*(
+            pip_install_cached_async("--no-deps", "-r", shard_file)
+            for shard_file in shard_files
+        ))
+        return all(code == 0 for code in returncodes)
+
+
+async def install_requirements():
     """安装 requirements.txt 中的依赖"""
     print("正在安装依赖...")
     print("="*70)
@@ -19,105 +146,74 @@ def install_requirements():
         return False
     
     try:
-        # 先安装 huggingface-hub 兼容版本（必须在 sentence-transformers 之前）
-        print("1. 安装 huggingface-hub==0.16.4（兼容版本）...")
-        subprocess.run(
-            [sys.executable, "-m", "pip", "install", "huggingface-hub==0.16.4"],
-            text=True
-        )
+        # 并行预装各依赖包（不解析依赖），失败时回退到串行安装
+        print("1. 安装依赖包（这可能需要几分钟）...")
+        if PIP_PARALLEL_DOWNLOADS > 1:
+            print(f"   并行安装（{PIP_PARALLEL_DOWNLOADS} 个 worker）...")
+            if not await _install_shards_parallel(requirements_file, PIP_PARALLEL_DOWNLOADS):
+                print("⚠️  并行安装失败，回退到串行安装")
         
-        # 使用 pip 安装，显示输出
-        print("\n2. 安装其他依赖包（这可能需要几分钟）...")
-        result = subprocess.run(
-            [sys.executable, "-m", "pip", "install", "-r", requirements_file],
-            text=True
-        )
+        # 完整安装一遍以解析依赖关系（已安装的包会直接跳过）；
+        # 兼容版本对随 requirements 一起交给同一次解析，保证版本匹配
+        print("\n2. 解析依赖并安装 huggingface-hub / sentence-transformers 兼容版本...")
+        result = pip_install_cached("-r", requirements_file, *PINNED_PACKAGES)
         
         if result.returncode == 0:
             print("✅ 依赖安装成功！")
             return True
-        else:
-            print(f"⚠️  依赖安装返回码: {result.returncode}")
-            # 尝试单独安装 sentence_transformers
-            print("\n尝试单独安装 sentence-transformers...")
-            result2 = subprocess.run(
-                [sys.executable, "-m", "pip", "install", "sentence-transformers==2.2.2"],
-                text=True
-            )
-            if result2.returncode == 0:
-                print("✅ sentence-transformers 安装成功！")
-                return True
-            return False
+        print(f"⚠️  依赖安装返回码: {result.returncode}")
+        return False
     except Exception as e:
         print(f"❌ 安装过程出错: {e}")
-        # 尝试单独安装 sentence_transformers
-        try:
-            print("\n尝试单独安装 sentence_transformers...")
-            subprocess.run(
-                [sys.executable, "-m", "pip", "install", "sentence-transformers==2.2.2"],
-                text=True
-            )
-        except:
-            pass
         return False
 
-def check_imports():
+# 关键模块，按导入开销从低到高排列（深度验证时遇到缺失可尽早停止）
+KEY_MODULES = (
+    "clickhouse_driver",
+    "openai",
+    "fastapi",
+    "pandas",
+    "matplotlib",
+    "faiss",
+    "sentence_transformers",
+)
+
+# 深度验证：实际导入各模块（会执行 torch 等重量级依赖的初始化）
+DEEP_VERIFY = "--deep-verify" in sys.argv
+
+
+def check_imports(deep=DEEP_VERIFY):
     """检查关键模块是否可以导入"""
     print("\n检查关键模块...")
     print("="*70)
     
-    modules = [
-        "fastapi",
-        "openai",
-        "clickhouse_driver",
-        "pandas",
-        "matplotlib",
-        "sentence_transformers",
-        "faiss"
-    ]
-    
+    # 只解析模块位置（find_spec），不执行模块初始化代码
     failed = []
-    for module in modules:
-        try:
-            __import__(module)
+    for module in KEY_MODULES:
+        if find_spec(module) is not None:
             print(f"  ✓ {module}")
-        except ImportError:
+        else:
             print(f"  ❌ {module} (未安装)")
             failed.append(module)
     
     if failed:
         print(f"\n❌ 以下模块未安装: {', '.join(failed)}")
-        
-        # 如果 sentence_transformers 未安装，尝试单独安装
-        if "sentence_transformers" in failed:
-            print("\n尝试单独安装 sentence-transformers...")
+        print("请手动运行: pip install -r requirements.txt")
+        return False
+    
+    if deep:
+        # 按开销从低到高实际导入，遇到第一个失败即停止
+        print("\n深度验证（实际导入）...")
+        for module in KEY_MODULES:
             try:
-                result = subprocess.run(
-                    [sys.executable, "-m", "pip", "install", "sentence-transformers==2.2.2"],
-                    text=True
-                )
-                if result.returncode == 0:
-                    print("✅ sentence-transformers 安装成功！")
-                    # 再次检查
-                    try:
-                        __import__("sentence_transformers")
-                        print("✅ sentence-transformers 验证成功")
-                        failed.remove("sentence_transformers")
-                    except ImportError:
-                        pass
+                importlib.import_module(module)
             except Exception as e:
-                print(f"⚠️  单独安装失败: {e}")
-        
-        if failed:
-            print(f"\n仍有未安装的模块: {', '.join(failed)}")
-            print("请手动运行: pip install -r requirements.txt")
-            return False
-        else:
-            print("\n✅ 所有关键模块已安装")
-            return True
-    else:
-        print("\n✅ 所有关键模块已安装")
-        return True
+                print(f"  ❌ {module} 导入失败: {e}")
+                return False
+            print(f"  ✓ {module}")
+    
+    print("\n✅ 所有关键模块已安装")
+    return True
 
 if __name__ == "__main__":
     print("="*70)
@@ -126,7 +222,7 @@ if __name__ == "__main__":
     print()
     
     # 安装依赖
-    if not install_requirements():
+    if not asyncio.run(install_requirements()):
         sys.exit(1)
     
     # 检查导入
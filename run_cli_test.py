@@ -5,21 +5,30 @@
 """
 import sys
 import os
+import runpy
 
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
 
-# 模拟命令行参数
-sys.argv = ['cli.py', '-q', '统计近1h，发起探测的探测设备(hostname)区分不同的任务(task_name）统计，分析这些设备的平均丢包和rtt情况']
+# 测试问题
+TEST_QUESTION = '统计近1h，发起探测的探测设备(hostname)区分不同的任务(task_name）统计，分析这些设备的平均丢包和rtt情况'
 
-# 导入并运行 CLI
-try:
-    from cli import main
-    main()
-except Exception as e:
-    print(f"\n❌ CLI 运行失败: {e}")
-    import traceback
-    traceback.print_exc()
-    sys.exit(1)
+
+def main():
+    """以 __main__ 方式运行 cli.py（模块在设置好命令行参数后才加载）"""
+    # 添加项目路径
+    sys.path.insert(0, PROJECT_DIR)
+    
+    # 模拟命令行参数
+    sys.argv = ['cli.py', '-q', TEST_QUESTION]
+    
+    try:
+        runpy.run_path(os.path.join(PROJECT_DIR, 'cli.py'), run_name='__main__')
+    except Exception as e:
+        print(f"\n❌ CLI 运行失败: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
 
 
+if __name__ == "__main__":
+    main()
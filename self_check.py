@@ -3,28 +3,40 @@
 自测脚本 - 评估AI分析回答质量
 用于代码调整后自动验证分析质量
 """
+import argparse
 import asyncio
-import json
+import hashlib
 import logging
 import re
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from collections import Counter
+from typing import Dict, List, Any, Optional, Set, Tuple
 from dataclasses import dataclass
 
+import orjson
+
 from agent.simple_planner import get_planner
 from agent.functions import get_executor
 from agent.analyzer import analyze_result
+from config.settings import settings
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# QueryPlan 磁盘缓存目录（重复自测时跳过相同问题的规划调用）
+PLAN_CACHE_DIR = Path("agent_cache")
+# QueryPlan 缓存版本：规划器、提示词、RAG 知识库或 LLM 调用方式变更后递增，使旧缓存整体失效
+PLAN_CACHE_VERSION = 1
+
 
 @dataclass
 class TestCase:
     """测试用例"""
+    # 含默认值字段（min_length），手写 __slots__ 会与类属性冲突，因此不声明 __slots__
     id: str
     question: str
     expected_keywords: List[str]  # 预期包含的关键词
@@ -36,6 +48,9 @@ class TestCase:
 @dataclass
 class TestResult:
     """测试结果"""
+    # 手写 __slots__（dataclass(slots=True) 需要 Python 3.10+，项目目标版本为 3.8）
+    __slots__ = ("test_id", "question", "answer", "sql", "passed", "score", "issues", "execution_time")
+    
     test_id: str
     question: str
     answer: str
@@ -49,75 +64,113 @@ class TestResult:
 class AnswerQualityChecker:
     """回答质量检查器"""
     
+    # 预编译的正则与关键词集合（类加载时构建一次）
+    _PCT_PATTERN = r'(?P<pct>\d+(?:\.\d+)?)\s*%'
+    _EMPTY_PHRASES = frozenset({"总的来说", "综上所述", "值得注意的是", "需要指出的是"})
+    _REQUIRED_STRUCTURES = frozenset({"发现", "数据", "分析"})
+    _VAGUE_WORDS = ("约", "大概", "左右")
+    _ADVICE_WORDS = frozenset({"建议", "优化"})
+    # 百分比与固定词表合并为一个带命名分组的正则，一次遍历完成提取与计数
+    # （词表内各词互不重叠，且都不含数字，finditer 的结果与逐项查找一致）
+    _FUSED_RE = re.compile(_PCT_PATTERN + "|" + "|".join(
+        f"(?P<{group}>{'|'.join(map(re.escape, words))})"
+        for group, words in (
+            ("empty", sorted(_EMPTY_PHRASES)),
+            ("structure", sorted(_REQUIRED_STRUCTURES)),
+            ("vague", _VAGUE_WORDS),
+            ("advice", sorted(_ADVICE_WORDS)),
+            ("problem", ("问题",)),
+        )
+    ))
+    
     def __init__(self):
         self.passed_tests = 0
         self.failed_tests = 0
         self.results: List[TestResult] = []
     
-    def check_relevance(self, answer: str, question: str, expected_focus: str) -> Tuple[bool, List[str]]:
+    def _scan(self, answer: str) -> Tuple[Counter, Set[str], List[str]]:
+        """
+        单次遍历回答，提取百分比数值并统计固定词表的命中情况
+        
+        Returns:
+            (各分组命中次数, 命中过的词集合, 百分比数值列表)
+        """
+        group_counts = Counter()
+        found = set()
+        percentages = []
+        for match in self._FUSED_RE.finditer(answer):
+            pct = match.group("pct")
+            if pct is not None:
+                percentages.append(pct)
+                continue
+            group_counts[match.lastgroup] += 1
+            found.add(match.group())
+        return group_counts, found, percentages
+    
+    def check_relevance(self, answer: str, question: str, expected_focus: str,
+                        answer_lower: Optional[str] = None,
+                        scan: Optional[Tuple[Counter, Set[str], List[str]]] = None) -> Tuple[bool, List[str]]:
         """检查回答相关性"""
         issues = []
+        if answer_lower is None:
+            answer_lower = answer.lower()
+        _, found, _ = scan or self._scan(answer)
         
         # 检查是否针对用户问题
-        if "设备数量" in question and "device_count" not in answer.lower():
-            if "count" in answer.lower() and "device" not in answer.lower():
+        if "设备数量" in question and "device_count" not in answer_lower:
+            if "count" in answer_lower and "device" not in answer_lower:
                 issues.append("可能分析了错误的数据列（count而非device_count）")
         
         # 检查是否包含预期的分析重点
-        if expected_focus.lower() not in answer.lower():
+        if expected_focus.lower() not in answer_lower:
             issues.append(f"缺少预期的分析重点：{expected_focus}")
         
         # 检查是否有空话套话
-        empty_phrases = ["总的来说", "综上所述", "值得注意的是", "需要指出的是"]
-        if sum(1 for phrase in empty_phrases if phrase in answer) > 2:
+        if len(found & self._EMPTY_PHRASES) > 2:
             issues.append("包含过多空话套话")
         
         return len(issues) == 0, issues
     
-    def check_data_accuracy(self, answer: str) -> Tuple[bool, List[str]]:
+    def check_data_accuracy(self, answer: str,
+                            scan: Optional[Tuple[Counter, Set[str], List[str]]] = None) -> Tuple[bool, List[str]]:
         """检查数据准确性"""
         issues = []
+        group_counts, found, percentages = scan or self._scan(answer)
         
-        # 查找百分比数字，检查是否合理
-        percentage_pattern = r'(\d+(?:\.\d+)?)\s*%|百分比'
-        percentages = re.findall(percentage_pattern, answer)
-        
+        # 检查百分比数字是否合理
         for pct in percentages:
-            try:
-                pct_float = float(pct)
-                if pct_float > 100:
-                    issues.append(f"异常的百分比值：{pct}%")
-                elif pct_float < 0:
-                    issues.append(f"负数的百分比值：{pct}%")
-            except ValueError:
-                continue
+            pct_float = float(pct)
+            if pct_float > 100:
+                issues.append(f"异常的百分比值：{pct}%")
+            elif pct_float < 0:
+                issues.append(f"负数的百分比值：{pct}%")
         
         # 检查是否有编造数据的嫌疑
-        if "约" in answer and "%" in answer:
+        if "约" in found and "%" in answer:
             # 简单检查：避免过多模糊表述
-            vague_count = answer.count("约") + answer.count("大概") + answer.count("左右")
-            if vague_count > 3:
+            if group_counts["vague"] > 3:
                 issues.append("模糊表述过多，可能影响数据准确性")
         
         return len(issues) == 0, issues
     
-    def check_value_orientation(self, answer: str, expected_keywords: List[str]) -> Tuple[bool, List[str]]:
+    def check_value_orientation(self, answer: str, expected_keywords: List[str],
+                                scan: Optional[Tuple[Counter, Set[str], List[str]]] = None) -> Tuple[bool, List[str]]:
         """检查价值导向"""
         issues = []
+        _, found, _ = scan or self._scan(answer)
         
         # 检查是否包含关键词
-        found_keywords = sum(1 for keyword in expected_keywords if keyword in answer)
+        found_keywords = sum(keyword in answer for keyword in expected_keywords)
         if found_keywords < len(expected_keywords) / 2:
             issues.append(f"缺少预期的关键词：{expected_keywords}")
         
         # 检查是否有具体建议
-        if "建议" not in answer and "优化" not in answer:
-            if "问题" in answer:  # 如果提到了问题但没有建议
+        if not found & self._ADVICE_WORDS:
+            if "问题" in found:  # 如果提到了问题但没有建议
                 issues.append("指出了问题但未提供具体建议")
         
         # 检查分析结构
-        required_structures = ["发现", "数据", "分析"]
-        structure_score = sum(1 for structure in required_structures if structure in answer)
+        structure_score = len(found & self._REQUIRED_STRUCTURES)
         if structure_score < 2:
             issues.append("分析结构不够完整")
         
@@ -132,10 +185,20 @@ class AnswerQualityChecker:
         elif len(answer) > 800:
             issues.append("回答过长，可能包含冗余信息")
         
-        # 检查句子完整性
-        sentences = answer.split("。")
-        incomplete_sentences = sum(1 for s in sentences if len(s.strip()) < 5)
-        if incomplete_sentences > len(sentences) * 0.3:
+        # 检查句子完整性：按 "。" 切分的片段数由 count 直接得出，
+        # 逐段用 find 定位分隔符，不构造句子列表
+        sentence_count = answer.count("。") + 1
+        incomplete_sentences = 0
+        start = 0
+        while True:
+            end = answer.find("。", start)
+            segment_end = len(answer) if end == -1 else end
+            if len(answer[start:segment_end].strip()) < 5:
+                incomplete_sentences += 1
+            if end == -1:
+                break
+            start = end + 1
+        if incomplete_sentences > sentence_count * 0.3:
             issues.append("存在过多不完整的句子")
         
         return len(issues) == 0, issues
@@ -145,17 +208,21 @@ class AnswerQualityChecker:
         start_time = time.time()
         
         all_issues = []
+        answer_lower = answer.lower()
+        scan = self._scan(answer)
         
         # 相关性检查
-        relevance_ok, relevance_issues = self.check_relevance(answer, test_case.question, test_case.expected_focus)
+        relevance_ok, relevance_issues = self.check_relevance(
+            answer, test_case.question, test_case.expected_focus, answer_lower, scan
+        )
         all_issues.extend(relevance_issues)
         
         # 数据准确性检查
-        accuracy_ok, accuracy_issues = self.check_data_accuracy(answer)
+        accuracy_ok, accuracy_issues = self.check_data_accuracy(answer, scan)
         all_issues.extend(accuracy_issues)
         
         # 价值导向检查
-        value_ok, value_issues = self.check_value_orientation(answer, test_case.expected_keywords)
+        value_ok, value_issues = self.check_value_orientation(answer, test_case.expected_keywords, scan)
         all_issues.extend(value_issues)
         
         # 长度质量检查
@@ -198,17 +265,59 @@ class AnswerQualityChecker:
 class SelfCheckRunner:
     """自测运行器"""
     
-    def __init__(self):
+    # 同时执行的测试数上限（限制 LLM 并发请求）
+    MAX_CONCURRENT_TESTS = 4
+    
+    def __init__(self, use_plan_cache: bool = True):
         self.quality_checker = AnswerQualityChecker()
+        # 为 False 时每个测试都重新调用 planner.plan（验证规划相关改动时使用）
+        self.use_plan_cache = use_plan_cache
+        # 规划器与执行器在所有测试间共享，只初始化一次（LLM 客户端、RAG 索引、ClickHouse 连接）
+        self.planner = get_planner()
+        self.executor = get_executor()
+        # planner/executor 均为同步阻塞调用（LLM HTTP + ClickHouse），放到线程池中执行
+        self._pool = ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_TESTS)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+    
+    def close(self):
+        """释放线程池"""
+        self._pool.shutdown(wait=False)
+    
+    @staticmethod
+    def _cached_plan(planner, question: str) -> Dict[str, Any]:
+        """
+        带磁盘缓存的 planner.plan
+        
+        缓存键由 PLAN_CACHE_VERSION、规划器类与 LLM 配置（模型、API 地址）组成；
+        修改规划相关代码或提示词后需递增 PLAN_CACHE_VERSION，或以 --no-plan-cache 运行。
+        SQL 不做缓存：生成的 SQL 内嵌当前时间戳，跨运行复用会过期。
+        """
+        planner_cls = type(planner)
+        key_parts = (
+            PLAN_CACHE_VERSION,
+            f"{planner_cls.__module__}.{planner_cls.__qualname__}",
+            settings.OPENAI_MODEL,
+            settings.OPENAI_API_BASE,
+            question,
+        )
+        key = hashlib.sha256(orjson.dumps(key_parts)).hexdigest()
+        cache_path = PLAN_CACHE_DIR / f"{key}.plan.json"
+        
+        if cache_path.exists():
+            return orjson.loads(cache_path.read_bytes())
+        
+        query_plan = planner.plan(question)
+        PLAN_CACHE_DIR.mkdir(exist_ok=True)
+        cache_path.write_bytes(orjson.dumps(query_plan, option=orjson.OPT_NON_STR_KEYS))
+        return query_plan
     
     def load_test_cases(self, test_file: str = "test_cases.json") -> List[TestCase]:
         """加载测试用例"""
         test_path = Path(test_file)
         
         if test_path.exists():
-            with open(test_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return [TestCase(**case) for case in data["test_cases"]]
+            data = orjson.loads(test_path.read_bytes())
+            return [TestCase(**case) for case in data["test_cases"]]
         
         # 默认测试用例
         return self._get_default_test_cases()
@@ -258,18 +367,30 @@ class SelfCheckRunner:
         logger.info(f"执行测试 {test_case.id}: {test_case.description}")
         logger.info(f"问题: {test_case.question}")
         
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            # 单独调用（未经 run_all_tests）时在当前事件循环中创建
+            self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_TESTS)
+        
         try:
-            # 1. 生成查询计划
-            planner = get_planner()
-            query_plan = planner.plan(test_case.question)
-            
-            # 2. 执行查询
-            executor = get_executor()
-            df = executor.run_query(query_plan)
-            sql = executor.get_generated_sql(query_plan)
-            
-            # 3. 生成分析
-            answer = executor.explain_result(df, query_plan)
+            async with self._semaphore:
+                # 1. 生成查询计划
+                if self.use_plan_cache:
+                    query_plan = await loop.run_in_executor(
+                        self._pool, self._cached_plan, self.planner, test_case.question
+                    )
+                else:
+                    query_plan = await loop.run_in_executor(
+                        self._pool, self.planner.plan, test_case.question
+                    )
+                
+                # 2. 执行查询
+                executor = self.executor
+                df = await executor.run_query_async(query_plan, self._pool)
+                sql = executor.get_generated_sql(query_plan)
+                
+                # 3. 生成分析
+                answer = await loop.run_in_executor(self._pool, executor.explain_result, df, query_plan)
             
             # 4. 评估质量
             result = self.quality_checker.evaluate_answer(test_case, answer, sql)
@@ -300,7 +421,8 @@ class SelfCheckRunner:
         test_cases = self.load_test_cases()
         start_time = time.time()
         
-        # 并行执行测试
+        # 并行执行测试（阻塞调用在线程池中运行，信号量限制并发数）
+        self._semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_TESTS)
         tasks = [self.run_single_test(case) for case in test_cases]
         results = await asyncio.gather(*tasks)
         
@@ -340,8 +462,9 @@ class SelfCheckRunner:
     
     def save_report(self, report: Dict[str, Any], output_file: str = "self_check_report.json"):
         """保存测试报告"""
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(report, f, ensure_ascii=False, indent=2)
+        Path(output_file).write_bytes(
+            orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        )
         logger.info(f"📊 测试报告已保存到: {output_file}")
     
     def print_summary(self, report: Dict[str, Any]):
@@ -368,9 +491,9 @@ class SelfCheckRunner:
         print("\n" + "="*60)
 
 
-async def main():
+async def main(use_plan_cache: bool = True):
     """主函数"""
-    runner = SelfCheckRunner()
+    runner = SelfCheckRunner(use_plan_cache=use_plan_cache)
     
     try:
         # 运行所有测试
@@ -392,7 +515,13 @@ async def main():
     except Exception as e:
         logger.error(f"自测执行失败: {e}")
         exit(1)
+    finally:
+        runner.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="自测脚本 - 评估AI分析回答质量")
+    parser.add_argument("--no-plan-cache", action="store_true",
+                        help="不使用 QueryPlan 磁盘缓存，每个测试重新调用规划器")
+    args = parser.parse_args()
+    asyncio.run(main(use_plan_cache=not args.no_plan_cache))
\ No newline at end of file
@@ -7,18 +7,88 @@ import sys
 import os
 import ast
 import re
+import hashlib
+import marshal
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# 解析结果缓存目录：按 (路径, mtime_ns, size) 记录文件中定义的类名/函数名，未修改的文件跳过 ast.parse
+AST_CACHE_DIR = Path.home() / ".cache" / "wk-ai-test" / "ast"
+
+
+def parse_definitions(filepath, source=None, st=None):
+    """
+    解析文件并收集其中定义的类名与函数名（带磁盘缓存）
+    
+    Args:
+        filepath: 文件路径
+        source: 调用方已读取的文件内容，为 None 时由本函数读取
+        st: 与 source 对应的 os.stat_result，为 None 时由本函数获取
+    
+    Returns:
+        (是否解析成功, 错误信息, 类名集合, 函数名集合)
+    """
+    try:
+        if st is None:
+            st = os.stat(filepath)
+        key = f"{os.path.abspath(filepath)}:{st.st_mtime_ns}:{st.st_size}"
+        cache_file = AST_CACHE_DIR / f"{hashlib.sha1(key.encode()).hexdigest()}.marshal"
+        try:
+            classes, functions = marshal.loads(cache_file.read_bytes())
+            return True, None, set(classes), set(functions)
+        except (OSError, EOFError, ValueError, TypeError):
+            pass
+        
+        if source is None:
+            with open(filepath, 'r', encoding='utf-8') as f:
+                source = f.read()
+        tree = ast.parse(source, filename=filepath)
+    except SyntaxError as e:
+        return False, str(e), set(), set()
+    except Exception as e:
+        return False, str(e), set(), set()
+    
+    # 遍历一次 AST 收集所有定义名
+    classes = set()
+    functions = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef):
+            classes.add(node.name)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.add(node.name)
+    
+    # 只缓存解析成功的结果；缓存写入失败不影响检查
+    try:
+        AST_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(marshal.dumps((sorted(classes), sorted(functions))))
+    except OSError:
+        pass
+    return True, None, classes, functions
+
 
 def check_file_syntax(filepath):
     """检查文件语法"""
+    ok, error, _, _ = parse_definitions(filepath)
+    return ok, error
+
+def inspect_file(filepath):
+    """
+    检查单个文件：语法、定义名与文件内容（供并发调用）
+    
+    Returns:
+        文件不存在时返回 None，否则返回 (是否解析成功, 错误信息, 类名集合, 函数名集合, 文件内容)
+    """
+    # 直接打开文件，不存在时由异常判断；内容与 stat 一并交给 parse_definitions，避免重复读取
     try:
         with open(filepath, 'r', encoding='utf-8') as f:
-            code = f.read()
-        ast.parse(code)
-        return True, None
-    except SyntaxError as e:
-        return False, str(e)
+            st = os.fstat(f.fileno())
+            content = f.read()
+    except FileNotFoundError:
+        return None
     except Exception as e:
-        return False, str(e)
+        return False, str(e), set(), set(), ""
+    ok, error, classes, functions = parse_definitions(filepath, content, st)
+    return ok, error, classes, functions, content
 
 def check_imports_in_file(filepath):
     """检查文件中的导入"""
@@ -41,20 +111,7 @@ def verify_cli_structure():
     
     issues = []
     
-    # 1. 检查 CLI 文件语法
     cli_file = "cli.py"
-    if os.path.exists(cli_file):
-        ok, error = check_file_syntax(cli_file)
-        if ok:
-            print(f"  ✓ {cli_file} 语法正确")
-        else:
-            print(f"  ❌ {cli_file} 语法错误: {error}")
-            issues.append(f"{cli_file} 语法错误")
-    else:
-        print(f"  ❌ {cli_file} 文件不存在")
-        issues.append(f"{cli_file} 文件不存在")
-    
-    # 2. 检查关键模块文件
     key_files = [
         "agent/llm.py",
         "agent/rag.py",
@@ -67,10 +124,30 @@ def verify_cli_structure():
         "config/settings.py"
     ]
     
+    # 各文件的读取与解析互不依赖，并发执行；输出仍按固定顺序
+    all_files = [cli_file] + key_files
+    with ThreadPoolExecutor(max_workers=min(len(all_files), os.cpu_count() or 4)) as pool:
+        results = dict(zip(all_files, pool.map(inspect_file, all_files)))
+    
+    # 1. 检查 CLI 文件语法
+    cli_result = results[cli_file]
+    if cli_result is not None:
+        ok, error = cli_result[0], cli_result[1]
+        if ok:
+            print(f"  ✓ {cli_file} 语法正确")
+        else:
+            print(f"  ❌ {cli_file} 语法错误: {error}")
+            issues.append(f"{cli_file} 语法错误")
+    else:
+        print(f"  ❌ {cli_file} 文件不存在")
+        issues.append(f"{cli_file} 文件不存在")
+    
+    # 2. 检查关键模块文件
     print("\n检查关键模块文件:")
     for filepath in key_files:
-        if os.path.exists(filepath):
-            ok, error = check_file_syntax(filepath)
+        result = results[filepath]
+        if result is not None:
+            ok, error = result[0], result[1]
             if ok:
                 print(f"  ✓ {filepath}")
             else:
@@ -80,15 +157,18 @@ def verify_cli_structure():
             print(f"  ❌ {filepath} 文件不存在")
             issues.append(f"{filepath} 文件不存在")
     
+    planner_result = results["agent/planner.py"]
+    functions_result = results["agent/functions.py"]
+    llm_result = results["agent/llm.py"]
+    
     # 3. 检查 CLI 必需函数
-    if os.path.exists(cli_file):
-        with open(cli_file, 'r', encoding='utf-8') as f:
-            cli_content = f.read()
+    if cli_result is not None:
+        cli_functions = cli_result[3]
         
         required_functions = ['main', 'test_query', 'print_section', 'print_step']
         print("\n检查 CLI 必需函数:")
         for func in required_functions:
-            if f"def {func}" in cli_content:
+            if func in cli_functions:
                 print(f"  ✓ {func} 函数存在")
             else:
                 print(f"  ❌ {func} 函数不存在")
@@ -98,22 +178,20 @@ def verify_cli_structure():
     print("\n检查关键类和方法:")
     
     # agent/planner.py
-    if os.path.exists("agent/planner.py"):
-        with open("agent/planner.py", 'r', encoding='utf-8') as f:
-            planner_content = f.read()
-        if "class QueryPlanner" in planner_content and "def plan" in planner_content:
+    if planner_result is not None:
+        _, _, planner_classes, planner_functions, _ = planner_result
+        if "QueryPlanner" in planner_classes and "plan" in planner_functions:
             print("  ✓ QueryPlanner.plan 存在")
         else:
             print("  ❌ QueryPlanner.plan 不存在")
             issues.append("QueryPlanner.plan 不存在")
     
     # agent/functions.py
-    if os.path.exists("agent/functions.py"):
-        with open("agent/functions.py", 'r', encoding='utf-8') as f:
-            functions_content = f.read()
+    if functions_result is not None:
+        executor_functions = functions_result[3]
         required_methods = ['run_query', 'get_generated_sql', 'draw_chart_wrapper', 'explain_result']
         for method in required_methods:
-            if f"def {method}" in functions_content:
+            if method in executor_functions:
                 print(f"  ✓ QueryPlanExecutor.{method} 存在")
             else:
                 print(f"  ❌ QueryPlanExecutor.{method} 不存在")
@@ -121,19 +199,15 @@ def verify_cli_structure():
     
     # 5. 检查 group_by_hostname_task 支持
     print("\n检查 group_by_hostname_task 支持:")
-    if os.path.exists("agent/planner.py"):
-        with open("agent/planner.py", 'r', encoding='utf-8') as f:
-            planner_content = f.read()
-        if "group_by_hostname_task" in planner_content:
+    if planner_result is not None:
+        if "group_by_hostname_task" in planner_result[4]:
             print("  ✓ planner.py 包含 group_by_hostname_task")
         else:
             print("  ❌ planner.py 缺少 group_by_hostname_task")
             issues.append("planner.py 缺少 group_by_hostname_task")
     
-    if os.path.exists("agent/functions.py"):
-        with open("agent/functions.py", 'r', encoding='utf-8') as f:
-            functions_content = f.read()
-        if "group_by_hostname_task" in functions_content:
+    if functions_result is not None:
+        if "group_by_hostname_task" in functions_result[4]:
             print("  ✓ functions.py 包含 group_by_hostname_task 处理")
         else:
             print("  ❌ functions.py 缺少 group_by_hostname_task 处理")
@@ -141,9 +215,8 @@ def verify_cli_structure():
     
     # 6. 检查 LLM 客户端 proxies 修复
     print("\n检查 LLM 客户端修复:")
-    if os.path.exists("agent/llm.py"):
-        with open("agent/llm.py", 'r', encoding='utf-8') as f:
-            llm_content = f.read()
+    if llm_result is not None:
+        llm_content = llm_result[4]
         if "HTTP_PROXY" in llm_content or "proxies" in llm_content.lower():
             if "os.environ.pop" in llm_content or "saved_proxy_vars" in llm_content:
                 print("  ✓ LLM 客户端已修复 proxies 问题")
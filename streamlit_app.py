@@ -2,11 +2,14 @@
 Streamlit前端应用 - 网络探测数据AI分析
 基于Streamlit的Python前端实现
 """
+import base64
 import streamlit as st
-import requests
+import httpx
+from httpx import ConnectError, TimeoutException
 import pandas as pd
 import time
-from typing import Optional, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List
 import json
 import os
 
@@ -21,6 +24,60 @@ st.set_page_config(
 # API配置
 API_BASE_URL = "http://localhost:8000"
 
+# 示例问题：(按钮 key, 问题文本)，key 在模块加载时生成一次
+_EXAMPLES = tuple((f"example_{i}", text) for i, text in enumerate((
+    "统计近1h各运营商的探测设备数量",
+    "分析各个目标节点的丢包情况",
+    "查看浙江电信的网络覆盖质量",
+    "对比不同运营商的网络性能",
+    "查询过去24小时各省份的平均延迟",
+    "绘制辽宁到上海的RTT分布图",
+)))
+
+# 每次重跑时直接渲染的最近消息条数（更早的消息折叠显示）
+HISTORY_WINDOW = 20
+
+# 局部重跑：片段内的交互只重跑片段本身，不再执行整个脚本
+# （st.fragment 需要 Streamlit >= 1.37，更早版本为 experimental_fragment；都不支持时退化为整页重跑）
+if hasattr(st, "fragment"):
+    chat_fragment = st.fragment
+    _FRAGMENT_RERUN_KWARGS = {"scope": "fragment"}
+elif hasattr(st, "experimental_fragment"):
+    chat_fragment = st.experimental_fragment
+    _FRAGMENT_RERUN_KWARGS = {}
+else:
+    def chat_fragment(func):
+        return func
+    _FRAGMENT_RERUN_KWARGS = {}
+
+
+@st.cache_resource
+def get_http_client() -> httpx.Client:
+    """
+    获取带连接池的 HTTP 客户端（跨脚本重跑复用，保持 Keep-Alive 连接）
+    
+    Returns:
+        httpx.Client 实例
+    """
+    return httpx.Client(
+        base_url=API_BASE_URL,
+        timeout=60.0,
+        # 传入 transport 时 Client 的 limits 参数不生效，连接池上限需设在 transport 上；连接失败时自动重试
+        transport=httpx.HTTPTransport(
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=10),
+            retries=3
+        )
+    )
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_chat(message: str) -> Dict[str, Any]:
+    """
+    请求聊天API（按消息缓存 5 分钟；请求失败时抛出异常，异常结果不会被缓存）
+    """
+    response = get_http_client().post("/chat", json={"message": message})
+    response.raise_for_status()
+    return response.json()
+
 def call_chat_api(message: str) -> Dict[str, Any]:
     """
     调用聊天API
@@ -32,33 +89,57 @@ def call_chat_api(message: str) -> Dict[str, Any]:
         API响应结果
     """
     try:
-        response = requests.post(
-            f"{API_BASE_URL}/chat",
-            json={"message": message},
-            timeout=60
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.ConnectionError:
+        return _fetch_chat(message)
+    except ConnectError:
         return {"error": "无法连接到后端服务，请确保app.py正在运行"}
-    except requests.exceptions.Timeout:
+    except TimeoutException:
         return {"error": "请求超时，请稍后重试"}
     except Exception as e:
         return {"error": f"请求失败: {str(e)}"}
 
+def prefetch_chat(messages: List[str]) -> int:
+    """
+    并发请求多个问题，将结果写入 _fetch_chat 缓存
+    
+    Args:
+        messages: 问题列表
+        
+    Returns:
+        成功预取的数量
+    """
+    with ThreadPoolExecutor(max_workers=max(1, len(messages))) as pool:
+        responses = list(pool.map(call_chat_api, messages))
+    return sum("error" not in response for response in responses)
+
+@st.cache_data(ttl=10, show_spinner=False)
 def check_api_health() -> bool:
     """
-    检查API健康状态
+    检查API健康状态（结果缓存 10 秒，避免每次重跑脚本都发起请求）
     
     Returns:
         API是否可用
     """
     try:
-        response = requests.get(f"{API_BASE_URL}/health", timeout=5)
+        response = get_http_client().get("/health", timeout=5)
         return response.status_code == 200
     except:
         return False
 
+@st.cache_data(ttl=3600, show_spinner=False)
+def _fetch_chart(url: str) -> bytes:
+    """
+    下载图表图片（按 URL 缓存，重跑脚本时不再重复请求后端）
+    
+    Args:
+        url: 图表URL（相对于 API_BASE_URL）
+        
+    Returns:
+        图片字节
+    """
+    with get_http_client().stream("GET", url, timeout=10) as response:
+        response.raise_for_status()
+        return b"".join(response.iter_bytes(chunk_size=64 * 1024))
+
 def display_message(role: str, content: str, chart_url: Optional[str] = None, sql: Optional[str] = None):
     """
     显示消息
@@ -66,7 +147,7 @@ def display_message(role: str, content: str, chart_url: Optional[str] = None, sq
     Args:
         role: 消息角色 (user/assistant)
         content: 消息内容
-        chart_url: 图表URL
+        chart_url: 图表URL，或内联图表的 data URI
         sql: SQL查询语句
     """
     if role == "user":
@@ -85,48 +166,35 @@ def display_message(role: str, content: str, chart_url: Optional[str] = None, sq
             # 显示图表
             if chart_url:
                 try:
-                    st.image(f"{API_BASE_URL}{chart_url}", caption="分析图表", use_column_width=True)
+                    if chart_url.startswith("data:"):
+                        # 内联图表直接解码，无需再请求后端
+                        image = base64.b64decode(chart_url.split(",", 1)[1])
+                    else:
+                        image = _fetch_chart(chart_url)
+                    st.image(image, caption="分析图表", use_column_width=True)
                 except Exception as e:
                     st.error(f"图表加载失败: {e}")
 
-def main():
-    """主函数"""
-    # 页面标题
-    st.title("🌐 网络探测数据AI分析")
-    st.markdown("---")
-    
-    # 侧边栏配置
-    with st.sidebar:
-        st.header("🔧 系统状态")
-        
-        # 检查API连接
-        if check_api_health():
-            st.success("✅ 后端服务连接正常")
-        else:
-            st.error("❌ 后端服务连接失败")
-            st.info("请先启动后端服务：`python3 app.py`")
-        
-        st.markdown("---")
-        st.header("📋 快速示例")
-        
-        # 示例问题
-        examples = [
-            "统计近1h各运营商的探测设备数量",
-            "分析各个目标节点的丢包情况", 
-            "查看浙江电信的网络覆盖质量",
-            "对比不同运营商的网络性能",
-            "查询过去24小时各省份的平均延迟",
-            "绘制辽宁到上海的RTT分布图"
-        ]
-        
-        for example in examples:
-            if st.button(example, key=f"example_{example}"):
-                st.session_state.selected_example = example
-    
-    # 初始化聊天历史
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
+def display_history_message(message: Dict[str, Any]):
+    """
+    显示一条历史消息
     
+    Args:
+        message: st.session_state.messages 中的消息字典
+    """
+    if message["role"] == "user":
+        display_message("user", message["content"])
+    else:
+        display_message(
+            "assistant",
+            message["content"],
+            message.get("chart_url"),
+            message.get("sql")
+        )
+
+@chat_fragment
+def chat_panel():
+    """聊天面板（欢迎信息、历史消息与输入区域），作为片段独立重跑"""
     # 显示欢迎信息
     if not st.session_state.messages:
         st.markdown("""
@@ -174,17 +242,17 @@ def main():
                 "sql": response.get("sql")
             })
     
-    # 显示历史消息
-    for message in st.session_state.messages:
-        if message["role"] == "user":
-            display_message("user", message["content"])
-        else:
-            display_message(
-                "assistant",
-                message["content"],
-                message.get("chart_url"),
-                message.get("sql")
-            )
+    # 显示历史消息：默认只渲染最近 HISTORY_WINDOW 条，更早的消息勾选后才渲染
+    messages = st.session_state.messages
+    older, recent = messages[:-HISTORY_WINDOW], messages[-HISTORY_WINDOW:]
+    if older:
+        with st.expander(f"显示历史 ({len(older)})", expanded=False):
+            # expander 折叠时内容仍会执行，用复选框控制是否真正渲染
+            if st.checkbox("加载更早的消息", key="load_older_messages"):
+                for message in older:
+                    display_history_message(message)
+    for message in recent:
+        display_history_message(message)
     
     # 用户输入
     st.markdown("---")
@@ -234,8 +302,45 @@ def main():
                 "sql": response.get("sql")
             })
         
-        # 刷新页面以清空输入框
-        st.rerun()
+        # 只重跑聊天面板以清空重复显示的消息，侧边栏与底部信息不再重新执行
+        st.rerun(**_FRAGMENT_RERUN_KWARGS)
+
+def main():
+    """主函数"""
+    # 页面标题
+    st.title("🌐 网络探测数据AI分析")
+    st.markdown("---")
+    
+    # 侧边栏配置
+    with st.sidebar:
+        st.header("🔧 系统状态")
+        
+        # 检查API连接
+        if check_api_health():
+            st.success("✅ 后端服务连接正常")
+        else:
+            st.error("❌ 后端服务连接失败")
+            st.info("请先启动后端服务：`python3 app.py`")
+        
+        st.markdown("---")
+        st.header("📋 快速示例")
+        
+        for key, example in _EXAMPLES:
+            if st.button(example, key=key):
+                st.session_state.selected_example = example
+        
+        # 预取全部示例：并发请求并写入缓存，之后点击示例可直接返回
+        if st.checkbox("启用示例预取", key="enable_prefetch"):
+            if st.button("⚡ 预取全部示例", key="prefetch_examples"):
+                with st.spinner("正在预取示例结果..."):
+                    prefetched = prefetch_chat([example for _, example in _EXAMPLES])
+                st.success(f"已预取 {prefetched}/{len(_EXAMPLES)} 个示例")
+    
+    # 初始化聊天历史
+    if "messages" not in st.session_state:
+        st.session_state.messages = []
+    
+    chat_panel()
     
     # 底部信息
     st.markdown("---")
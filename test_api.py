@@ -2,10 +2,16 @@
 """
 API 测试脚本
 """
-import requests
+import httpx
 import json
 import sys
 
+# 复用同一个客户端（保持 Keep-Alive 连接，连续测试时不再重复建立 TCP 连接）
+_CLIENT = httpx.Client(
+    timeout=300.0,  # 5分钟超时
+    limits=httpx.Limits(max_keepalive_connections=10)
+)
+
 def test_chat_api(question: str, base_url: str = "http://localhost:8000"):
     """测试 /chat API"""
     url = f"{base_url}/chat"
@@ -15,11 +21,7 @@ def test_chat_api(question: str, base_url: str = "http://localhost:8000"):
     print(f"{'='*60}\n")
     
     try:
-        response = requests.post(
-            url,
-            json={"message": question},
-            timeout=300  # 5分钟超时
-        )
+        response = _CLIENT.post(url, json={"message": question})
         
         if response.status_code != 200:
             print(f"❌ 请求失败: {response.status_code}")
@@ -41,15 +43,19 @@ def test_chat_api(question: str, base_url: str = "http://localhost:8000"):
         print(result.get("answer", "N/A"))
         print()
         
-        if result.get("chart_url"):
+        chart_url = result.get("chart_url")
+        if chart_url:
             print(f"{'='*60}")
-            print(f"图表路径: {result['chart_url']}")
-            print(f"访问地址: {base_url}{result['chart_url']}")
+            if chart_url.startswith("data:"):
+                print(f"图表: 内联 data URI（{len(chart_url)} 字节）")
+            else:
+                print(f"图表路径: {chart_url}")
+                print(f"访问地址: {base_url}{chart_url}")
             print(f"{'='*60}\n")
         
         return result
         
-    except requests.exceptions.ConnectionError:
+    except httpx.ConnectError:
         print("❌ 连接失败: 请确保服务已启动 (python3 app.py)")
         return None
     except Exception as e:
@@ -3,17 +3,20 @@ pytest 配置文件
 定义测试夹具和通用配置
 """
 import pytest
-import asyncio
 import pandas as pd
 from unittest.mock import Mock, patch
-from agent.simple_planner import SimpleQueryPlanner
-from agent.functions import QueryPlanExecutor
-from config.settings import Settings
 
+# agent/config 模块在各夹具内按需导入：只有用到对应夹具的测试才加载
+# LLM 客户端、ClickHouse 驱动、matplotlib 等重量级依赖，缩短测试收集时间
 
-@pytest.fixture
+
+@pytest.fixture(scope="session")
 def sample_dataframe():
-    """提供示例 DataFrame 用于测试"""
+    """
+    提供示例 DataFrame 用于测试
+    
+    整个测试会话共享同一个实例，测试中只读使用；需要修改数据时请先 .copy()
+    """
     return pd.DataFrame({
         'hostname': ['host1', 'host2', 'host3'],
         'target_node': ['node1', 'node2', 'node3'],
@@ -26,9 +29,10 @@ def sample_dataframe():
     })
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_settings():
     """提供模拟配置"""
+    from config.settings import Settings
     return Settings(
         OPENAI_API_KEY="test_key",
         CLICKHOUSE_PASSWORD="test_password",
@@ -39,12 +43,14 @@ def mock_settings():
 @pytest.fixture
 def query_planner():
     """提供查询规划器实例"""
+    from agent.simple_planner import SimpleQueryPlanner
     return SimpleQueryPlanner()
 
 
 @pytest.fixture
 def query_executor():
     """提供查询执行器实例"""
+    from agent.functions import QueryPlanExecutor
     return QueryPlanExecutor()
 
 
@@ -56,15 +62,6 @@ def mock_llm_response():
     }
 
 
-# 异步测试支持
-@pytest.fixture(scope="session")
-def event_loop():
-    """创建事件循环用于异步测试"""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
-
-
 # Mock 配置
 @pytest.fixture(autouse=True)
 def mock_env_vars(monkeypatch):
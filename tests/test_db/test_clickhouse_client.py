@@ -0,0 +1,94 @@
+"""
+ClickHouse 客户端 SQL 安全校验测试模块
+"""
+import pytest
+from config.settings import settings
+from db.clickhouse_client import ClickHouseClient, _DANGER_RE
+
+
+@pytest.fixture
+def client():
+    """提供不建立连接的客户端实例（_validate_sql 不依赖连接参数）"""
+    return object.__new__(ClickHouseClient)
+
+
+class TestDangerKeywords:
+    """危险关键字按整词匹配的测试类"""
+    
+    @pytest.mark.parametrize("sql", [
+        "SELECT created_at FROM t WHERE timestamp > now() LIMIT 10",
+        "SELECT avg(drop_rate) AS drop_rate FROM t WHERE timestamp > now() LIMIT 10",
+        "SELECT updated_by, insert_time FROM t WHERE timestamp > now() LIMIT 10",
+    ])
+    def test_identifier_containing_keyword_passes(self, client, sql):
+        """测试包含关键字子串的列名不被误判"""
+        assert _DANGER_RE.search(sql.lower()) is None
+        client._validate_sql(sql)
+    
+    @pytest.mark.parametrize("sql, keyword", [
+        ("SELECT 1; DROP TABLE t", "drop"),
+        ("SELECT 1;DROP TABLE t", "drop"),
+        ("SELECT 1;\nALTER\tTABLE t DELETE WHERE 1", "alter"),
+        ("select * from t where x in (select 1) or truncate", "truncate"),
+    ])
+    def test_dangerous_statement_rejected(self, client, sql, keyword):
+        """测试以分号、空白或制表符分隔的危险语句仍被拒绝"""
+        with pytest.raises(ValueError, match="危险关键字"):
+            client._validate_sql(sql)
+        assert _DANGER_RE.search(sql.lower()).group(1) == keyword
+    
+    def test_non_select_rejected(self, client):
+        """测试非 SELECT 语句直接被拒绝"""
+        with pytest.raises(ValueError, match="只允许执行 SELECT"):
+            client._validate_sql("DROP TABLE t")
+
+
+class TestEnsureLimit:
+    """最外层 LIMIT 补全与截断的测试类"""
+    
+    @pytest.fixture(autouse=True)
+    def max_rows(self, monkeypatch):
+        """将最大行数固定为 100"""
+        monkeypatch.setattr(settings, "MAX_QUERY_ROWS", 100)
+    
+    def test_missing_limit_appended(self, client):
+        """测试没有 LIMIT 时追加"""
+        assert client._ensure_limit("SELECT a FROM t") == "SELECT a FROM t\nLIMIT 100"
+    
+    def test_limit_within_max_unchanged(self, client):
+        """测试未超过最大值的 LIMIT 保持不变"""
+        assert client._ensure_limit("SELECT a FROM t LIMIT 50") == "SELECT a FROM t LIMIT 50"
+    
+    def test_limit_above_max_clamped(self, client):
+        """测试超过最大值的 LIMIT 被调整"""
+        assert client._ensure_limit("SELECT a FROM t LIMIT 5000") == "SELECT a FROM t LIMIT 100"
+    
+    def test_subquery_limit_only(self, client):
+        """测试只有子查询 LIMIT 时仍追加最外层 LIMIT，子查询保持不变"""
+        sql = "SELECT a FROM (SELECT a FROM t LIMIT 5000)"
+        assert client._ensure_limit(sql) == sql + "\nLIMIT 100"
+    
+    @pytest.mark.parametrize("sql", [
+        "SELECT 'limit 5' AS s FROM t",
+        "SELECT a FROM t /* LIMIT 5 */",
+    ])
+    def test_limit_in_string_or_comment_ignored(self, client, sql):
+        """测试字符串或注释中的 LIMIT 不计入"""
+        assert client._ensure_limit(sql) == sql + "\nLIMIT 100"
+    
+    def test_limit_by_not_a_row_limit(self, client):
+        """测试 LIMIT n BY 不视为结果行数限制"""
+        sql = "SELECT a, b FROM t ORDER BY b LIMIT 1 BY a"
+        assert client._ensure_limit(sql) == sql + "\nLIMIT 100"
+    
+    def test_limit_offset_above_max_clamped(self, client):
+        """测试 LIMIT offset, n 只调整行数"""
+        assert client._ensure_limit("SELECT a FROM t LIMIT 10, 5000") == "SELECT a FROM t LIMIT 10, 100"
+    
+    def test_trailing_semicolon_removed(self, client):
+        """测试末尾分号在追加 LIMIT 前去掉"""
+        assert client._ensure_limit("SELECT a FROM t; ") == "SELECT a FROM t\nLIMIT 100"
+    
+    def test_trailing_line_comment(self, client):
+        """测试末尾单行注释不会吞掉追加的 LIMIT"""
+        assert client._ensure_limit("SELECT a FROM t -- limit 5") == "SELECT a FROM t -- limit 5\nLIMIT 100"
